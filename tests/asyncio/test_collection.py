@@ -1,7 +1,11 @@
+import httpx
 import pytest
 
-from tests import INDEX_NAME
+from tests import INDEX_NAME, TOKEN, URL, assert_eventually_async
 from upstash_search import AsyncSearch
+from upstash_search.errors import BatchUpsertError, ClientError
+from upstash_search.paths import UPSERT_PATH
+from upstash_search.types import Document
 
 
 @pytest.mark.asyncio
@@ -51,3 +55,119 @@ async def test_info_async(async_search: AsyncSearch) -> None:
 
     index_info = info.indexes[INDEX_NAME]
     assert index_info.document_count > 0
+
+
+@pytest.mark.asyncio
+async def test_search_indexes_async(async_search: AsyncSearch) -> None:
+    other_name = INDEX_NAME + "-other"
+    await async_search.index(INDEX_NAME).upsert(
+        [("id-0", {"data": 0}), ("id-1", {"data": 1})]
+    )
+    other_index = async_search.index(other_name)
+    await other_index.reset()
+    await other_index.upsert([("id-0", {"data": 2})])
+
+    async def assertion() -> None:
+        scores = await async_search.search_indexes(
+            [INDEX_NAME, other_name],
+            "data",
+            limit=3,
+            weights={other_name: 0.5},
+            normalize="minmax",
+        )
+        assert len(scores) == 3
+
+        assert {(score.index, score.id) for score in scores} == {
+            (INDEX_NAME, "id-0"),
+            (INDEX_NAME, "id-1"),
+            (other_name, "id-0"),
+        }
+        assert [score.score for score in scores] == sorted(
+            (score.score for score in scores), reverse=True
+        )
+        assert max(score.score for score in scores if score.index == other_name) <= 0.5
+
+    try:
+        await assert_eventually_async(assertion)
+    finally:
+        await async_search.delete_index(other_name)
+
+
+@pytest.mark.asyncio
+async def test_copy_index_async(async_search: AsyncSearch) -> None:
+    other_name = INDEX_NAME + "-copy"
+    index = async_search.index(INDEX_NAME)
+    await index.reset()
+    await index.upsert([(f"id-{i}", {"data": i}, {"key": i}) for i in range(5)])
+    other_index = async_search.index(other_name)
+    await other_index.reset()
+
+    try:
+        summary = await async_search.copy_index(INDEX_NAME, other_name, batch_size=2)
+        assert summary.document_count == 5
+        assert summary.batch_count == 3
+        assert summary.failed_batches == []
+        assert summary.documents_per_second > 0
+
+        assert await other_index.fetch(ids=["id-0", "id-4"]) == [
+            Document(id="id-0", content={"data": 0}, metadata={"key": 0}),
+            Document(id="id-4", content={"data": 4}, metadata={"key": 4}),
+        ]
+
+        await other_index.reset()
+        summary = await async_search.copy_index(
+            INDEX_NAME,
+            other_name,
+            transform=lambda doc: (
+                (doc.id, {"data": doc.content["data"] * 10})
+                if doc.content["data"] % 2 == 0
+                else None
+            ),
+        )
+        assert summary.document_count == 3
+
+        documents = sorted(
+            [doc async for doc in other_index.iter_range()], key=lambda doc: doc.id
+        )
+        assert [(doc.id, doc.content) for doc in documents] == [
+            ("id-0", {"data": 0}),
+            ("id-2", {"data": 20}),
+            ("id-4", {"data": 40}),
+        ]
+
+        with pytest.raises(ClientError):
+            await async_search.copy_index(INDEX_NAME, INDEX_NAME)
+    finally:
+        await async_search.delete_index(other_name)
+
+
+@pytest.mark.asyncio
+async def test_copy_index_failed_batches_async() -> None:
+    async_search = AsyncSearch(url=URL, token=TOKEN, retries=0)
+    index = async_search.index(INDEX_NAME)
+    await index.reset()
+    await index.upsert([(f"id-{i}", {"data": i}) for i in range(5)])
+
+    client = async_search._requester._client
+
+    async def fail_upserts(request: httpx.Request) -> httpx.Response:
+        if request.url.path.startswith(UPSERT_PATH):
+            raise httpx.ConnectError("unavailable", request=request)
+
+        response = await client.send(request)
+        return httpx.Response(response.status_code, content=response.content)
+
+    async_search._requester._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(fail_upserts)
+    )
+
+    with pytest.raises(BatchUpsertError) as error:
+        await async_search.copy_index(INDEX_NAME, INDEX_NAME + "-copy", batch_size=2)
+
+    assert len(error.value.failed) == 3
+
+    summary = await async_search.copy_index(
+        INDEX_NAME, INDEX_NAME + "-copy", batch_size=2, raise_on_error=False
+    )
+    assert summary.batch_count == 3
+    assert len(summary.failed_batches) == 3
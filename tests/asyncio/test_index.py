@@ -1,8 +1,29 @@
+import asyncio
+import json
+import pathlib
+import threading
+import typing as t
+
+import httpx
 import pytest
 
-from tests import assert_eventually_async
-from upstash_search import AsyncIndex
-from upstash_search.types import Document
+from tests import INDEX_NAME, TOKEN, URL, assert_eventually_async
+from upstash_search import AsyncIndex, AsyncSearch
+from upstash_search.cache import SearchCache
+from upstash_search.errors import ClientError
+from upstash_search.manifest import Manifest
+from upstash_search.ranges import AdaptivePageSize, amerge_pages
+from upstash_search.results import ResultSet
+from upstash_search.types import (
+    CacheStats,
+    Document,
+    RangeDocuments,
+    SearchQuery,
+    SearchResult,
+    UpsertBatchResult,
+    UpsertDocumentT,
+)
+from upstash_search.utils import DEFAULT_BATCH_BYTES, abatch_documents
 
 
 @pytest.mark.asyncio
@@ -91,6 +112,22 @@ async def test_upsert_single_async(async_index: AsyncIndex) -> None:
     assert documents[2].metadata is None
 
 
+@pytest.mark.asyncio
+async def test_upsert_generator_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert((f"id-{i}", {"data": i}) for i in range(3))
+
+    documents = await async_index.fetch(
+        ids=["id-0", "id-1", "id-2"],
+    )
+
+    assert len(documents) == 3
+
+    for i, document in enumerate(documents):
+        assert document is not None
+        assert document.id == f"id-{i}"
+        assert document.content == {"data": i}
+
+
 @pytest.mark.asyncio
 async def test_upsert_invalid_tuple_or_dict_async(async_index: AsyncIndex) -> None:
     with pytest.raises(Exception):
@@ -105,6 +142,287 @@ async def test_upsert_invalid_tuple_or_dict_async(async_index: AsyncIndex) -> No
     with pytest.raises(Exception):
         await async_index.upsert(documents=["something else"])  # type: ignore[list-item]
 
+    with pytest.raises(ClientError):
+        await async_index.upsert(documents="id-0")  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_upsert_empty_async(async_index: AsyncIndex) -> None:
+    requests: t.List[str] = []
+
+    async def record(request: httpx.Request) -> None:
+        requests.append(request.url.path)
+
+    async_index._requester._client.event_hooks["request"].append(record)
+
+    await async_index.upsert([])
+    await async_index.upsert(iter([]))
+
+    assert requests == []
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_async(async_index: AsyncIndex) -> None:
+    documents = [(f"id-{i}", {"data": i}) for i in range(10)]
+
+    results = await async_index.upsert_many(documents, batch_size=4)
+
+    assert [result.batch for result in results] == [0, 1, 2]
+    assert [result.document_count for result in results] == [4, 4, 2]
+    assert all(result.size > 0 for result in results)
+
+    fetched = await async_index.fetch(ids=[f"id-{i}" for i in range(10)])
+
+    for i, document in enumerate(fetched):
+        assert document is not None
+        assert document.id == f"id-{i}"
+        assert document.content == {"data": i}
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_max_batch_bytes_async(async_index: AsyncIndex) -> None:
+    documents = [(f"id-{i}", {"data": "x" * 40}) for i in range(3)]
+
+    results = await async_index.upsert_many(documents, max_batch_bytes=150)
+
+    assert [result.document_count for result in results] == [1, 1, 1]
+    assert all(result.size <= 150 for result in results)
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_concurrently_async(async_index: AsyncIndex) -> None:
+    documents = [(f"id-{i % 5}", {"data": i}) for i in range(30)]
+
+    results = await async_index.upsert_many(documents, batch_size=2, concurrency=4)
+
+    assert [result.batch for result in results] == list(range(15))
+    assert all(result.error is None for result in results)
+
+    fetched = await async_index.fetch(ids=[f"id-{i}" for i in range(5)])
+
+    for i, document in enumerate(fetched):
+        assert document is not None
+        assert document.content == {"data": 25 + i}
+
+
+@pytest.mark.asyncio
+async def test_ingest_async(async_index: AsyncIndex) -> None:
+    async def documents() -> t.AsyncIterator[UpsertDocumentT]:
+        for i in range(10):
+            yield f"id-{i}", {"data": i}
+
+    summary = await async_index.ingest(documents(), batch_size=3, concurrency=2)
+
+    assert summary.document_count == 10
+    assert summary.batch_count == 4
+    assert summary.size > 0
+    assert summary.latency_p50 <= summary.latency_p90 <= summary.latency_p99
+    assert summary.failed_batches == []
+
+    fetched = await async_index.fetch(ids=[f"id-{i}" for i in range(10)])
+
+    for i, document in enumerate(fetched):
+        assert document is not None
+        assert document.content == {"data": i}
+
+    # The documents of a sync iterable are encoded off the event loop
+    threads: t.Set[int] = set()
+
+    def sync_documents() -> t.Iterator[UpsertDocumentT]:
+        for i in range(10):
+            threads.add(threading.get_ident())
+            yield f"id-{i}", {"data": i}
+
+    summary = await async_index.ingest(sync_documents(), batch_size=3)
+    assert summary.document_count == 10
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_upsert_batches_callback_error_async(async_index: AsyncIndex) -> None:
+    documents = [(f"id-{i}", {"data": i}) for i in range(6)]
+
+    def on_result(result: UpsertBatchResult) -> None:
+        if result.batch == 1:
+            raise RuntimeError("checkpoint failed")
+
+    with pytest.raises(RuntimeError, match="checkpoint failed"):
+        await async_index.upsert_batches(
+            abatch_documents(documents, 2, DEFAULT_BATCH_BYTES),
+            concurrency=2,
+            on_result=on_result,
+        )
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_manifest_async(
+    async_index: AsyncIndex, tmp_path: pathlib.Path
+) -> None:
+    documents = [(f"id-{i}", {"data": i}, {"key": i}) for i in range(5)]
+
+    with Manifest(tmp_path / "manifest.db") as manifest:
+        results = await async_index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 5
+
+        documents[2] = ("id-2", {"data": 20}, {"key": 2})
+        results = await async_index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 1
+
+        results = await async_index.upsert_many(documents, manifest=manifest)
+        assert results == []
+
+    document = (await async_index.fetch(ids=["id-2"]))[0]
+    assert document is not None
+    assert document.content == {"data": 20}
+
+
+@pytest.mark.asyncio
+async def test_manifest_reset_and_delete_async(async_index: AsyncIndex) -> None:
+    documents = [(f"id-{i}", {"data": i}) for i in range(3)]
+
+    with Manifest() as manifest:
+        await async_index.upsert_many(documents, manifest=manifest)
+
+        await async_index.delete(ids=["id-0"])
+        results = await async_index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 1
+
+        await async_index.reset()
+        results = await async_index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 3
+
+    fetched = await async_index.fetch(ids=["id-0", "id-2"])
+    assert all(document is not None for document in fetched)
+
+
+@pytest.mark.asyncio
+async def test_import_jsonl_async(
+    async_index: AsyncIndex, tmp_path: pathlib.Path
+) -> None:
+    path = tmp_path / "documents.jsonl"
+    with open(path, "w") as f:
+        for i in range(5):
+            record = {"id": f"id-{i}", "content": {"data": i}, "metadata": {"key": i}}
+            f.write(json.dumps(record) + "\n")
+
+    results = await async_index.import_jsonl(path, batch_size=2, concurrency=2)
+
+    assert [result.document_count for result in results] == [2, 2, 1]
+    assert results[-1].offset == path.stat().st_size
+
+    fetched = await async_index.fetch(ids=[f"id-{i}" for i in range(5)])
+
+    for i, document in enumerate(fetched):
+        assert document is not None
+        assert document.content == {"data": i}
+        assert document.metadata == {"key": i}
+
+
+@pytest.mark.asyncio
+async def test_job_async(async_index: AsyncIndex, tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "documents.jsonl"
+    with open(path, "w") as f:
+        for i in range(5):
+            f.write(json.dumps({"id": f"id-{i}", "content": {"data": i}}) + "\n")
+
+    job = async_index.job("job", checkpoint_dir=tmp_path, batch_size=2, concurrency=2)
+
+    results = await job.import_jsonl(path)
+    assert [result.document_count for result in results] == [2, 2, 1]
+
+    with open(tmp_path / "job.checkpoint.json") as f:
+        checkpoint = json.load(f)
+
+    assert checkpoint["offset"] == path.stat().st_size
+    assert checkpoint["completed"] is True
+
+    # Running a completed job again does nothing
+    assert await job.import_jsonl(path) == []
+
+
+@pytest.mark.asyncio
+async def test_writer_async(async_index: AsyncIndex) -> None:
+    async with async_index.writer(max_documents=3, flush_interval=None) as writer:
+        await writer.upsert(("id-0", {"data": 0}))
+        await writer.upsert([("id-1", {"data": 1}), ("id-2", {"data": 2})])
+
+        # The third operation fills the buffer and flushes it
+        assert (await async_index.fetch(ids=["id-0"]))[0] is not None
+
+        await writer.upsert(("id-3", {"data": 3}))
+        await writer.delete(ids=["id-0"])
+
+        assert (await async_index.fetch(ids=["id-3"]))[0] is None
+
+    documents = await async_index.fetch(ids=["id-0", "id-1", "id-2", "id-3"])
+
+    assert documents[0] is None
+    for i in range(1, 4):
+        document = documents[i]
+        assert document is not None
+        assert document.content == {"data": i}
+
+
+@pytest.mark.asyncio
+async def test_writer_coalesces_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert(("id-2", {"data": 2}))
+
+    async with async_index.writer(flush_interval=None) as writer:
+        await writer.upsert(("id-0", {"data": 0}))
+        await writer.upsert(("id-0", {"data": 1}))
+        await writer.upsert(("id-1", {"data": 1}))
+        await writer.delete(ids=["id-1", "id-2"])
+
+    documents = await async_index.fetch(ids=["id-0", "id-1", "id-2"])
+
+    assert documents[0] is not None
+    assert documents[0].content == {"data": 1}
+    assert documents[1] is None
+    assert documents[2] is None
+
+
+@pytest.mark.asyncio
+async def test_writer_flush_interval_async(async_index: AsyncIndex) -> None:
+    async with async_index.writer(flush_interval=0.1) as writer:
+        await writer.upsert(("id-0", {"data": 0}))
+
+        async def assertion() -> None:
+            assert (await async_index.fetch(ids=["id-0"]))[0] is not None
+
+        await assert_eventually_async(assertion)
+
+
+@pytest.mark.asyncio
+async def test_writer_failed_flush_async() -> None:
+    index = AsyncSearch(url=URL, token=TOKEN, retries=0).index(INDEX_NAME)
+    await index.reset()
+    client = index._requester._client
+
+    def fail(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("unavailable", request=request)
+
+    async with index.writer(flush_interval=None) as writer:
+        await writer.upsert([("id-0", {"data": 0}), ("id-1", {"data": 1})])
+        await writer.delete(ids=["id-2"])
+
+        index._requester._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(fail)
+        )
+        with pytest.raises(httpx.ConnectError):
+            await writer.flush()
+
+        index._requester._client = client
+
+        # The newer operation of a document wins over the unsent one
+        await writer.upsert(("id-1", {"data": 10}))
+
+    documents = await index.fetch(ids=["id-0", "id-1"])
+
+    assert [document.content if document else None for document in documents] == [
+        {"data": 0},
+        {"data": 10},
+    ]
+
 
 @pytest.mark.asyncio
 async def test_search_async(async_index: AsyncIndex) -> None:
@@ -128,6 +446,122 @@ async def test_search_async(async_index: AsyncIndex) -> None:
     await assert_eventually_async(assertion)
 
 
+@pytest.mark.asyncio
+async def test_search_columnar_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert(
+        documents=[
+            ("id-0", {"data": 0}),
+            ("id-1", {"data": 1}, {"key": 1}),
+            ("i-d-2", {"data": 2}, {"key": 2}),
+        ]
+    )
+
+    async def assertion() -> None:
+        results = await async_index.search_columnar("data", limit=3)
+        assert len(results) == 3
+
+        assert sorted(results.ids) == ["i-d-2", "id-0", "id-1"]
+        assert list(results.scores) == sorted(results.scores, reverse=True)
+        assert results.content[results.ids.index("id-1")] == {"data": 1}
+        assert results.metadata[results.ids.index("id-1")] == {"key": 1}
+
+        top = results.normalize().top_k(2)
+        assert top.ids == results.ids[:2]
+        assert float(top.scores[0]) == 1.0
+
+        merged = ResultSet.merge(results.top_k(1), results, k=2)
+        assert merged.ids == results.ids[:2]
+
+    await assert_eventually_async(assertion)
+
+
+@pytest.mark.asyncio
+async def test_search_cache_async(async_index: AsyncIndex) -> None:
+    cache = SearchCache(max_size=2, ttl=60.0)
+    async_index = AsyncSearch(url=URL, token=TOKEN, cache=cache).index(INDEX_NAME)
+    await async_index.upsert([("id-0", {"data": 0})])
+
+    first = await async_index.search("data", limit=1)
+    assert await async_index.search("data", limit=1) == first
+    assert cache.stats() == CacheStats(hits=1, misses=1, evictions=0, size=1)
+
+    await async_index.search("data", limit=2)
+    await async_index.search("data", limit=3)
+    assert cache.stats().evictions == 1
+    assert cache.stats().size == 2
+
+    await async_index.upsert([("id-1", {"data": 1})])
+    assert cache.stats().size == 0
+
+    first = await async_index.search("data", limit=1)
+    assert cache.stats().misses == 4
+
+    first[0].content["data"] = -1
+    first.clear()
+    assert (await async_index.search("data", limit=1))[0].content == {"data": 0}
+
+    lazy = await async_index.search("data", limit=1, lazy=True)
+    assert cache.stats().misses == 5
+    lazy[0].content["data"] = -1
+    assert (await async_index.search("data", limit=1, lazy=True))[0].content == {
+        "data": 0
+    }
+    assert cache.stats().hits == 3
+
+
+@pytest.mark.asyncio
+async def test_fetch_single_flight_async(async_index: AsyncIndex) -> None:
+    async_index = AsyncSearch(url=URL, token=TOKEN, single_flight=True).index(
+        INDEX_NAME
+    )
+    await async_index.upsert([("id-0", {"data": 0})])
+
+    requests: t.List[str] = []
+
+    async def record(request: httpx.Request) -> None:
+        requests.append(request.url.path)
+        await asyncio.sleep(0.1)
+
+    async_index._requester._client.event_hooks["request"].append(record)
+
+    results = await asyncio.gather(*(async_index.fetch(ids=["id-0"]) for _ in range(8)))
+
+    assert results[0] == [Document(id="id-0", content={"data": 0})]
+    assert all(result is results[0] for result in results)
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_many_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert([(f"id-{i}", {"data": i}) for i in range(3)])
+
+    queries = [SearchQuery("data", limit=i + 1) for i in range(3)]
+    results = await async_index.search_many(["data", *queries], concurrency=2)
+
+    assert [result.query for result in results] == [SearchQuery("data"), *queries]
+
+    for result in results:
+        assert result.error is None
+        assert len(result.document_scores) <= result.query.limit
+
+    # Only as many tasks as the concurrency are created for the queries
+    search_query = async_index._search_query
+    tasks = len(asyncio.all_tasks())
+    peak_tasks = 0
+
+    async def record(query: t.Union[str, SearchQuery]) -> SearchResult:
+        nonlocal peak_tasks
+        peak_tasks = max(peak_tasks, len(asyncio.all_tasks()) - tasks)
+        return await search_query(query)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(async_index, "_search_query", record)
+        results = await async_index.search_many(["data"] * 20, concurrency=2)
+
+    assert len(results) == 20
+    assert peak_tasks == 2
+
+
 @pytest.mark.asyncio
 async def test_search_filter_async(async_index: AsyncIndex) -> None:
     await async_index.upsert(
@@ -180,6 +614,53 @@ async def test_fetch_async(async_index: AsyncIndex) -> None:
     assert documents[2] is None
 
 
+@pytest.mark.asyncio
+async def test_fetch_lazy_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert(
+        [("id-0", {"data": 0}, {"meta": 0}), ("id-1", {"data": 1})]
+    )
+
+    documents = await async_index.fetch(ids=["id-0", "id-1", "id-2"], lazy=True)
+    range_documents = await async_index.range(limit=2, lazy=True)
+
+    assert [doc.id if doc is not None else None for doc in documents] == [
+        "id-0",
+        "id-1",
+        None,
+    ]
+
+    assert documents == [
+        Document(id="id-0", content={"data": 0}, metadata={"meta": 0}),
+        Document(id="id-1", content={"data": 1}),
+        None,
+    ]
+
+    assert range_documents.documents == documents[:2]
+
+
+@pytest.mark.asyncio
+async def test_fetch_projection_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert([("id-0", {"title": "t", "body": "b"}, {"meta": 0})])
+
+    documents = await async_index.fetch(ids=["id-0"], include_metadata=False)
+    assert documents == [Document(id="id-0", content={"title": "t", "body": "b"})]
+
+    documents = await async_index.fetch(ids=["id-0"], include_content=False)
+    assert documents == [Document(id="id-0", content={}, metadata={"meta": 0})]
+
+    documents = await async_index.fetch(
+        ids=["id-0"], content_fields=["title", "missing"]
+    )
+    assert documents == [
+        Document(id="id-0", content={"title": "t"}, metadata={"meta": 0})
+    ]
+
+    range_documents = await async_index.range(
+        limit=1, include_content=False, include_metadata=False
+    )
+    assert range_documents.documents == [Document(id="id-0")]
+
+
 @pytest.mark.asyncio
 async def test_fetch_with_prefix_async(async_index: AsyncIndex) -> None:
     await async_index.upsert(
@@ -337,6 +818,163 @@ async def test_range_prefix_async(async_index: AsyncIndex) -> None:
     assert range_documents.documents[0].metadata == {"key": 2}
 
 
+@pytest.mark.asyncio
+async def test_iter_range_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert(
+        [(f"id-{i}", {"data": i}) for i in range(5)] + [("other", {})]
+    )
+
+    documents = [doc async for doc in async_index.iter_range(page_size=2, prefix="id-")]
+    assert [doc.id for doc in documents] == [f"id-{i}" for i in range(5)]
+    assert [doc.content for doc in documents] == [{"data": i} for i in range(5)]
+
+    documents = [doc async for doc in async_index.iter_range(page_size=4, prefetch=0)]
+    assert len(documents) == 6
+
+    page_size = AdaptivePageSize(1, max_size=4, target_latency=60.0)
+    documents = [doc async for doc in async_index.iter_range(page_size=page_size)]
+    assert len(documents) == 6
+    assert page_size.size == 4
+
+
+@pytest.mark.asyncio
+async def test_amerge_pages_depth() -> None:
+    fetched: t.List[int] = []
+
+    async def scan() -> t.AsyncIterator[RangeDocuments]:
+        for i in range(10):
+            fetched.append(i)
+            yield RangeDocuments(next_cursor=str(i + 1), documents=[])
+
+    pages = amerge_pages([scan], concurrency=1, depth=2)
+    await pages.__anext__()
+    await asyncio.sleep(0.1)
+
+    # The page taken by the consumer and the two pages ahead of it
+    assert len(fetched) == 3
+
+    await pages.__anext__()
+    await asyncio.sleep(0.1)
+    assert len(fetched) == 4
+
+    assert len([page async for page in pages]) == 8
+
+
+@pytest.mark.asyncio
+async def test_iter_range_sharded_async(async_index: AsyncIndex) -> None:
+    await async_index.upsert(
+        [(f"a-{i}", {"data": i}) for i in range(5)]
+        + [(f"b-{i}", {"data": i}) for i in range(3)]
+        + [("other", {})]
+    )
+
+    documents = [
+        doc async for doc in async_index.iter_range_sharded(["a-", "b-"], page_size=2)
+    ]
+    assert sorted(doc.id for doc in documents) == sorted(
+        [f"a-{i}" for i in range(5)] + [f"b-{i}" for i in range(3)]
+    )
+
+    documents = [
+        doc
+        async for doc in async_index.iter_range_sharded(["a", "b", "o"], concurrency=2)
+    ]
+    assert len(documents) == 9
+
+    with pytest.raises(ClientError):
+        [doc async for doc in async_index.iter_range_sharded(["a", "a-"])]
+
+
+@pytest.mark.asyncio
+async def test_export_async(async_index: AsyncIndex, tmp_path: pathlib.Path) -> None:
+    documents = [(f"id-{i}", {"data": i}, {"key": i}) for i in range(5)]
+    await async_index.upsert(documents + [("other", {"data": "other"})])
+
+    path = tmp_path / "documents.jsonl"
+    assert await async_index.export(path, prefix="id-", page_size=2) == 5
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+
+    assert records == [
+        {"id": f"id-{i}", "content": {"data": i}, "metadata": {"key": i}}
+        for i in range(5)
+    ]
+
+    # The exported file can be imported back
+    await async_index.reset()
+    await async_index.import_jsonl(path)
+    assert (await async_index.fetch(ids=["id-0"]))[0] == Document(
+        id="id-0", content={"data": 0}, metadata={"key": 0}
+    )
+
+    # The prefixes are exported concurrently
+    path = tmp_path / "sharded.jsonl"
+    prefixes = ["id-0", "id-1", "id-2", "id-3", "id-4"]
+    assert (
+        await async_index.export(path, prefixes=prefixes, concurrency=2, page_size=1)
+        == 5
+    )
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+
+    assert sorted(records, key=lambda record: record["id"]) == [
+        {"id": f"id-{i}", "content": {"data": i}, "metadata": {"key": i}}
+        for i in range(5)
+    ]
+
+    with pytest.raises(ClientError):
+        await async_index.export(path, prefix="id-", prefixes=prefixes)
+
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    path = tmp_path / "documents.parquet"
+    assert await async_index.export(path, format="parquet", page_size=2) == 5
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.num_row_groups == 3
+    rows = parquet.read().to_pylist()
+    assert [row["id"] for row in rows] == [f"id-{i}" for i in range(5)]
+    assert [json.loads(row["content"]) for row in rows] == [
+        {"data": i} for i in range(5)
+    ]
+    assert [json.loads(row["metadata"]) for row in rows] == [
+        {"key": i} for i in range(5)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_failure_async(tmp_path: pathlib.Path) -> None:
+    index = AsyncSearch(url=URL, token=TOKEN, retries=0).index(INDEX_NAME)
+    await index.reset()
+    await index.upsert([(f"id-{i}", {"data": i}) for i in range(5)])
+
+    path = tmp_path / "documents.jsonl"
+    path.write_text("previous")
+
+    client = index._requester._client
+    pages: t.List[httpx.Request] = []
+
+    async def fail_second_page(request: httpx.Request) -> httpx.Response:
+        if pages:
+            raise httpx.ConnectError("unavailable", request=request)
+
+        pages.append(request)
+        response = await client.send(request)
+        return httpx.Response(response.status_code, content=response.content)
+
+    index._requester._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(fail_second_page)
+    )
+    with pytest.raises(httpx.ConnectError):
+        await index.export(path, page_size=2, prefetch=0)
+
+    # The previous file is kept, and the partial export is removed
+    assert path.read_text() == "previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+
 @pytest.mark.asyncio
 async def test_reset_async(async_index: AsyncIndex) -> None:
     await async_index.upsert(
@@ -1,8 +1,31 @@
+import dataclasses
+import json
+import pathlib
+import threading
+import time
+import tracemalloc
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
 import pytest
 
-from tests import assert_eventually
-from upstash_search import Index
-from upstash_search.types import Document
+from tests import INDEX_NAME, TOKEN, URL, assert_eventually
+from upstash_search import Index, Search, codec, decoders, utils
+from upstash_search.cache import SearchCache
+from upstash_search.errors import ClientError, UpstashError
+from upstash_search.manifest import Manifest
+from upstash_search.ranges import AdaptivePageSize, merge_pages
+from upstash_search.results import ResultSet
+from upstash_search.types import (
+    CacheStats,
+    Document,
+    DocumentScore,
+    RangeDocuments,
+    SearchQuery,
+    UpsertBatchResult,
+    UpsertDocumentT,
+)
 
 
 def test_upsert(index: Index) -> None:
@@ -89,6 +112,124 @@ def test_upsert_single(index: Index) -> None:
     assert documents[2].metadata is None
 
 
+def test_upsert_generator(index: Index) -> None:
+    index.upsert((f"id-{i}", {"data": i}) for i in range(3))
+
+    documents = index.fetch(
+        ids=["id-0", "id-1", "id-2"],
+    )
+
+    assert len(documents) == 3
+
+    for i, document in enumerate(documents):
+        assert document is not None
+        assert document.id == f"id-{i}"
+        assert document.content == {"data": i}
+
+
+@pytest.mark.parametrize("codec_name", ["json", "orjson", "msgspec"])
+def test_upsert_codec(index: Index, codec_name: codec.CodecName) -> None:
+    pytest.importorskip(codec_name)
+
+    previous = codec.codec_name
+    codec.use_codec(codec_name)
+    try:
+        index.upsert(
+            (f"id-{i}", {"data": i, "text": "ü", "wide": 2**70 + i}) for i in range(3)
+        )
+
+        documents = index.fetch(
+            ids=["id-0", "id-1", "id-2"],
+        )
+
+        # Re-encoded JSON Lines records keep the wide integers as well
+        assert codec.loads(b'{"wide":1180591620717411303424}') == {"wide": 2**70}
+    finally:
+        codec.use_codec(previous)
+
+    assert len(documents) == 3
+
+    for i, document in enumerate(documents):
+        assert document is not None
+        assert document.id == f"id-{i}"
+        assert document.content == {"data": i, "text": "ü", "wide": 2**70 + i}
+
+
+@pytest.mark.parametrize("typed_decoding", [False, True])
+def test_typed_decoding(index: Index, typed_decoding: bool) -> None:
+    if typed_decoding:
+        pytest.importorskip("msgspec")
+
+    index.upsert([("id-0", {"data": 0}, {"meta": 0}), ("id-1", {"data": 1})])
+
+    previous = decoders.typed_decoding
+    decoders.use_typed_decoding(typed_decoding)
+    try:
+        documents = index.fetch(ids=["id-0", "id-1", "id-2"])
+        range_documents = index.range(limit=2)
+    finally:
+        decoders.use_typed_decoding(previous)
+
+    assert documents == [
+        Document(id="id-0", content={"data": 0}, metadata={"meta": 0}),
+        Document(id="id-1", content={"data": 1}),
+        None,
+    ]
+
+    assert range_documents.documents == documents[:2]
+
+
+def test_typed_decoding_error() -> None:
+    pytest.importorskip("msgspec")
+
+    index = Search(url=URL, token=TOKEN, retries=0).index(INDEX_NAME)
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"result": [{"id": 0, "content": {}}]})
+
+    index._requester._client = httpx.Client(transport=httpx.MockTransport(respond))
+
+    previous = decoders.typed_decoding
+    decoders.use_typed_decoding(True)
+    try:
+        with pytest.raises(UpstashError):
+            index.fetch(ids=["id-0"])
+
+        with pytest.raises(UpstashError):
+            index.fetch(ids=["id-0"], lazy=True)
+    finally:
+        decoders.use_typed_decoding(previous)
+
+
+def test_document_payloads() -> None:
+    document: t.Dict[str, t.Any] = {"id": "id-0", "content": {"data": 0}}
+    forms: t.List[UpsertDocumentT] = [
+        document,
+        ("id-0", {"data": 0}),
+        ("id-0", {"data": 0}, None),
+        Document(id="id-0", content={"data": 0}),
+    ]
+
+    payloads = [utils._document_to_payload(form) for form in forms]
+    assert all(
+        payload == {"id": "id-0", "content": {"data": 0}, "metadata": None}
+        for payload in payloads
+    )
+    assert len({utils.encode_document(form) for form in forms}) == 1
+    assert len({utils.content_digest(payload) for payload in payloads}) == 1
+
+    # The caller's dict is not used as the payload
+    assert payloads[0] is not document
+    assert document == {"id": "id-0", "content": {"data": 0}}
+
+    forms = [
+        {"id": "id-0", "content": {"data": 0}, "metadata": {"key": 0}},
+        ("id-0", {"data": 0}, {"key": 0}),
+        Document(id="id-0", content={"data": 0}, metadata={"key": 0}),
+    ]
+    assert len({utils.encode_document(form) for form in forms}) == 1
+
+
 def test_upsert_invalid_tuple_or_dict(index: Index) -> None:
     with pytest.raises(Exception):
         index.upsert(documents=[("id",)])
@@ -102,6 +243,272 @@ def test_upsert_invalid_tuple_or_dict(index: Index) -> None:
     with pytest.raises(Exception):
         index.upsert(documents=["something else"])  # type: ignore[list-item]
 
+    with pytest.raises(ClientError):
+        index.upsert(documents="id-0")  # type: ignore[arg-type]
+
+
+def test_upsert_empty(index: Index) -> None:
+    requests: t.List[str] = []
+    index._requester._client.event_hooks["request"].append(
+        lambda request: requests.append(request.url.path)
+    )
+
+    index.upsert([])
+    index.upsert(iter([]))
+
+    assert requests == []
+
+
+def test_upsert_many(index: Index) -> None:
+    documents = [(f"id-{i}", {"data": i}) for i in range(10)]
+
+    results = index.upsert_many(documents, batch_size=4)
+
+    assert [result.batch for result in results] == [0, 1, 2]
+    assert [result.document_count for result in results] == [4, 4, 2]
+    assert all(result.size > 0 for result in results)
+
+    fetched = index.fetch(ids=[f"id-{i}" for i in range(10)])
+
+    for i, document in enumerate(fetched):
+        assert document is not None
+        assert document.id == f"id-{i}"
+        assert document.content == {"data": i}
+
+
+def test_upsert_many_max_batch_bytes(index: Index) -> None:
+    documents = [(f"id-{i}", {"data": "x" * 40}) for i in range(3)]
+
+    results = index.upsert_many(documents, max_batch_bytes=150)
+
+    assert [result.document_count for result in results] == [1, 1, 1]
+    assert all(result.size <= 150 for result in results)
+
+
+def test_upsert_many_coalesces(index: Index) -> None:
+    documents = [("id-0", {"data": i}) for i in range(3)]
+
+    results = index.upsert_many(documents)
+
+    assert [result.document_count for result in results] == [1]
+
+    document = index.fetch(ids=["id-0"])[0]
+    assert document is not None
+    assert document.content == {"data": 2}
+
+
+def test_upsert_many_concurrently(index: Index) -> None:
+    documents = [(f"id-{i % 5}", {"data": i}) for i in range(30)]
+
+    results = index.upsert_many(documents, batch_size=2, concurrency=4)
+
+    assert [result.batch for result in results] == list(range(15))
+    assert all(result.error is None for result in results)
+
+    fetched = index.fetch(ids=[f"id-{i}" for i in range(5)])
+
+    for i, document in enumerate(fetched):
+        assert document is not None
+        assert document.content == {"data": 25 + i}
+
+
+def test_upsert_batches_callback_error(index: Index) -> None:
+    documents = [(f"id-{i}", {"data": i}) for i in range(6)]
+
+    def on_result(result: UpsertBatchResult) -> None:
+        if result.batch == 1:
+            raise RuntimeError("checkpoint failed")
+
+    with pytest.raises(RuntimeError, match="checkpoint failed"):
+        index.upsert_batches(
+            utils.batch_documents(documents, 2, utils.DEFAULT_BATCH_BYTES),
+            concurrency=2,
+            on_result=on_result,
+        )
+
+
+def test_upsert_many_manifest(index: Index, tmp_path: pathlib.Path) -> None:
+    documents = [(f"id-{i}", {"data": i}, {"key": i}) for i in range(5)]
+
+    with Manifest(tmp_path / "manifest.db") as manifest:
+        results = index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 5
+
+        documents[2] = ("id-2", {"data": 20}, {"key": 2})
+        results = index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 1
+
+        results = index.upsert_many(documents, manifest=manifest)
+        assert results == []
+
+        # The latest upsert of an id wins, even when it is unchanged
+        index.upsert_many([("id-0", {"data": 100}), *documents], manifest=manifest)
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setattr(utils, "_DIGEST_LOOKUP_SIZE", 1)
+            index.upsert_many([("id-1", {"data": 100}), *documents], manifest=manifest)
+
+    fetched = index.fetch(ids=["id-0", "id-1", "id-2"])
+    assert [document.content if document else None for document in fetched] == [
+        {"data": 0},
+        {"data": 1},
+        {"data": 20},
+    ]
+
+
+def test_manifest_reset_and_delete(index: Index) -> None:
+    documents = [(f"id-{i}", {"data": i}) for i in range(3)]
+
+    with Manifest() as manifest:
+        index.upsert_many(documents, manifest=manifest)
+
+        index.delete(ids=["id-0"])
+        results = index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 1
+
+        index.reset()
+        results = index.upsert_many(documents, manifest=manifest)
+        assert sum(result.document_count for result in results) == 3
+
+    assert all(document is not None for document in index.fetch(ids=["id-0", "id-2"]))
+
+
+def test_import_jsonl(index: Index, tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "documents.jsonl"
+    with open(path, "w") as f:
+        for i in range(5):
+            record = {"id": f"id-{i}", "content": {"data": i}, "metadata": {"key": i}}
+            f.write(json.dumps(record) + "\n")
+
+    results = index.import_jsonl(path, batch_size=2)
+
+    assert [result.document_count for result in results] == [2, 2, 1]
+    assert results[-1].offset == path.stat().st_size
+
+    # Resuming from the offset of the first batch only imports the rest
+    index.reset()
+    results = index.import_jsonl(path, offset=results[0].offset or 0, batch_size=2)
+    assert [result.document_count for result in results] == [2, 1]
+
+    fetched = index.fetch(ids=[f"id-{i}" for i in range(5)])
+
+    assert fetched[0] is None
+    assert fetched[1] is None
+
+    for i in range(2, 5):
+        document = fetched[i]
+        assert document is not None
+        assert document.content == {"data": i}
+        assert document.metadata == {"key": i}
+
+
+def test_job(index: Index, tmp_path: pathlib.Path) -> None:
+    documents = [(f"id-{i}", {"data": i}) for i in range(6)]
+    job = index.job("job", checkpoint_dir=tmp_path, batch_size=2)
+
+    results = job.upsert(documents)
+    assert [result.offset for result in results] == [2, 4, 6]
+
+    # Running a completed job again does nothing
+    assert job.upsert(documents) == []
+
+    job.reset()
+    index.reset()
+
+    # Simulate an interrupted run that has acknowledged 4 documents
+    with open(tmp_path / "job.checkpoint.json", "w") as f:
+        json.dump(
+            {
+                "index": INDEX_NAME,
+                "source": "documents",
+                "offset": 4,
+                "completed": False,
+            },
+            f,
+        )
+
+    results = job.upsert(documents)
+    assert [result.document_count for result in results] == [2]
+
+    fetched = index.fetch(ids=[f"id-{i}" for i in range(6)])
+    assert [document is not None for document in fetched] == [False] * 4 + [True] * 2
+
+
+def test_writer(index: Index) -> None:
+    with index.writer(max_documents=3, flush_interval=None) as writer:
+        writer.upsert(("id-0", {"data": 0}))
+        writer.upsert([("id-1", {"data": 1}), ("id-2", {"data": 2})])
+
+        # The third operation fills the buffer and flushes it
+        assert index.fetch(ids=["id-0"])[0] is not None
+
+        writer.upsert(("id-3", {"data": 3}))
+        writer.delete(ids=["id-0"])
+
+        assert index.fetch(ids=["id-3"])[0] is None
+
+    documents = index.fetch(ids=["id-0", "id-1", "id-2", "id-3"])
+
+    assert documents[0] is None
+    for i in range(1, 4):
+        document = documents[i]
+        assert document is not None
+        assert document.content == {"data": i}
+
+
+def test_writer_coalesces(index: Index) -> None:
+    index.upsert(("id-2", {"data": 2}))
+
+    with index.writer(flush_interval=None) as writer:
+        writer.upsert(("id-0", {"data": 0}))
+        writer.upsert(("id-0", {"data": 1}))
+        writer.upsert(("id-1", {"data": 1}))
+        writer.delete(ids=["id-1", "id-2"])
+
+    documents = index.fetch(ids=["id-0", "id-1", "id-2"])
+
+    assert documents[0] is not None
+    assert documents[0].content == {"data": 1}
+    assert documents[1] is None
+    assert documents[2] is None
+
+
+def test_writer_flush_interval(index: Index) -> None:
+    with index.writer(flush_interval=0.1) as writer:
+        writer.upsert(("id-0", {"data": 0}))
+
+        def assertion() -> None:
+            assert index.fetch(ids=["id-0"])[0] is not None
+
+        assert_eventually(assertion)
+
+
+def test_writer_failed_flush(index: Index) -> None:
+    index = Search(url=URL, token=TOKEN, retries=0).index(INDEX_NAME)
+    client = index._requester._client
+
+    def fail(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("unavailable", request=request)
+
+    with index.writer(flush_interval=None) as writer:
+        writer.upsert([("id-0", {"data": 0}), ("id-1", {"data": 1})])
+        writer.delete(ids=["id-2"])
+
+        index._requester._client = httpx.Client(transport=httpx.MockTransport(fail))
+        with pytest.raises(httpx.ConnectError):
+            writer.flush()
+
+        index._requester._client = client
+
+        # The newer operation of a document wins over the unsent one
+        writer.upsert(("id-1", {"data": 10}))
+
+    documents = index.fetch(ids=["id-0", "id-1"])
+
+    assert [document.content if document else None for document in documents] == [
+        {"data": 0},
+        {"data": 10},
+    ]
+
 
 def test_search(index: Index) -> None:
     index.upsert(
@@ -124,6 +531,124 @@ def test_search(index: Index) -> None:
     assert_eventually(assertion)
 
 
+def test_search_columnar(index: Index) -> None:
+    index.upsert(
+        documents=[
+            ("id-0", {"data": 0}),
+            ("id-1", {"data": 1}, {"key": 1}),
+            ("i-d-2", {"data": 2}, {"key": 2}),
+        ]
+    )
+
+    def assertion() -> None:
+        results = index.search_columnar("data", limit=3)
+        assert len(results) == 3
+
+        assert sorted(results.ids) == ["i-d-2", "id-0", "id-1"]
+        assert list(results.scores) == sorted(results.scores, reverse=True)
+        assert results.content[results.ids.index("id-1")] == {"data": 1}
+        assert results.metadata[results.ids.index("id-1")] == {"key": 1}
+
+        top = results.normalize().top_k(2)
+        assert top.ids == results.ids[:2]
+        assert float(top.scores[0]) == 1.0
+
+        merged = ResultSet.merge(results.top_k(1), results, k=2)
+        assert merged.ids == results.ids[:2]
+
+        projected = index.search_columnar("data", limit=3, content_fields=[])
+        assert projected.content == [{}, {}, {}]
+
+    assert_eventually(assertion)
+
+
+def test_result_set_ties() -> None:
+    scores = [0.5, 0.9, 0.5, 0.5, 0.1, 0.5]
+    results = ResultSet(
+        [
+            DocumentScore(id=f"id-{i}", score=score, content={"data": i})
+            for i, score in enumerate(scores)
+        ]
+    )
+
+    top = results.top_k(3)
+    assert top.ids == ["id-1", "id-0", "id-2"]
+    assert top.content == [{"data": 1}, {"data": 0}, {"data": 2}]
+
+    merged = ResultSet.merge(results.top_k(2), results, k=4)
+    assert merged.ids == ["id-1", "id-0", "id-2", "id-3"]
+
+
+def test_search_cache(index: Index) -> None:
+    cache = SearchCache(max_size=2, ttl=60.0)
+    index = Search(url=URL, token=TOKEN, cache=cache).index(INDEX_NAME)
+    index.upsert([("id-0", {"data": 0})])
+
+    first = index.search("data", limit=1)
+    assert index.search("data", limit=1) == first
+    assert cache.stats() == CacheStats(hits=1, misses=1, evictions=0, size=1)
+
+    index.search("data", limit=2)
+    index.search("data", limit=3)
+    assert cache.stats().evictions == 1
+    assert cache.stats().size == 2
+
+    index.upsert([("id-1", {"data": 1})])
+    assert cache.stats().size == 0
+
+    first = index.search("data", limit=1)
+    assert cache.stats().misses == 4
+
+    first[0].content["data"] = -1
+    first.clear()
+    assert index.search("data", limit=1)[0].content == {"data": 0}
+
+    lazy = index.search("data", limit=1, lazy=True)
+    assert cache.stats().misses == 5
+    lazy[0].content["data"] = -1
+    assert (index.search("data", limit=1, lazy=True))[0].content == {"data": 0}
+    assert cache.stats().hits == 3
+
+
+def test_fetch_single_flight(index: Index) -> None:
+    index = Search(url=URL, token=TOKEN, single_flight=True).index(INDEX_NAME)
+    index.upsert([("id-0", {"data": 0})])
+
+    requests: t.List[str] = []
+
+    def record(request: httpx.Request) -> None:
+        requests.append(request.url.path)
+        # Keeps the fetch in flight until all the threads are waiting on it.
+        time.sleep(0.2)
+
+    index._requester._client.event_hooks["request"].append(record)
+
+    barrier = threading.Barrier(8)
+
+    def fetch(_: int) -> t.List[t.Optional[Document]]:
+        barrier.wait()
+        return index.fetch(ids=["id-0"])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(fetch, range(8)))
+
+    assert results == [[Document(id="id-0", content={"data": 0})]] * 8
+    assert len(requests) == 1
+
+
+def test_search_many(index: Index) -> None:
+    index.upsert([(f"id-{i}", {"data": i}) for i in range(3)])
+
+    queries = [SearchQuery("data", limit=i + 1) for i in range(3)]
+    results = index.search_many(["data", *queries], concurrency=2)
+
+    assert [result.query for result in results] == [SearchQuery("data"), *queries]
+
+    for result in results:
+        assert result.error is None
+        assert len(result.document_scores) <= result.query.limit
+
+
 def test_search_filter(index: Index) -> None:
     index.upsert(
         documents=[
@@ -174,6 +699,82 @@ def test_fetch(index: Index) -> None:
     assert documents[2] is None
 
 
+def test_fetch_slotted(index: Index) -> None:
+    index.upsert([("id-0", {"data": 0})])
+
+    documents = index.fetch(ids=["id-0"])
+
+    document = documents[0]
+    assert document is not None
+    assert not hasattr(document, "__dict__")
+
+    with pytest.raises(AttributeError):
+        document.other = 0  # type: ignore[attr-defined]
+
+
+def test_document_memory() -> None:
+    @dataclasses.dataclass
+    class UnslottedDocument:
+        id: str
+        content: t.Dict[t.Any, t.Any]
+        metadata: t.Optional[t.Dict[t.Any, t.Any]] = None
+
+    def allocated(cls: t.Type[t.Any]) -> int:
+        content: t.Dict[t.Any, t.Any] = {}
+        tracemalloc.start()
+        try:
+            documents = [cls(id="id", content=content) for _ in range(1000)]
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert len(documents) == 1000
+        return size
+
+    assert allocated(Document) < allocated(UnslottedDocument)
+
+
+def test_fetch_lazy(index: Index) -> None:
+    index.upsert([("id-0", {"data": 0}, {"meta": 0}), ("id-1", {"data": 1})])
+
+    documents = index.fetch(ids=["id-0", "id-1", "id-2"], lazy=True)
+    range_documents = index.range(limit=2, lazy=True)
+
+    assert [doc.id if doc is not None else None for doc in documents] == [
+        "id-0",
+        "id-1",
+        None,
+    ]
+
+    assert documents == [
+        Document(id="id-0", content={"data": 0}, metadata={"meta": 0}),
+        Document(id="id-1", content={"data": 1}),
+        None,
+    ]
+
+    assert range_documents.documents == documents[:2]
+
+
+def test_fetch_projection(index: Index) -> None:
+    index.upsert([("id-0", {"title": "t", "body": "b"}, {"meta": 0})])
+
+    documents = index.fetch(ids=["id-0"], include_metadata=False)
+    assert documents == [Document(id="id-0", content={"title": "t", "body": "b"})]
+
+    documents = index.fetch(ids=["id-0"], include_content=False)
+    assert documents == [Document(id="id-0", content={}, metadata={"meta": 0})]
+
+    documents = index.fetch(ids=["id-0"], content_fields=["title", "missing"])
+    assert documents == [
+        Document(id="id-0", content={"title": "t"}, metadata={"meta": 0})
+    ]
+
+    range_documents = index.range(
+        limit=1, include_content=False, include_metadata=False
+    )
+    assert range_documents.documents == [Document(id="id-0")]
+
+
 def test_fetch_with_prefix(index: Index) -> None:
     index.upsert(
         documents=[
@@ -325,6 +926,180 @@ def test_range_prefix(index: Index) -> None:
     assert range_documents.documents[0].metadata == {"key": 2}
 
 
+def test_iter_range(index: Index) -> None:
+    index.upsert([(f"id-{i}", {"data": i}) for i in range(5)] + [("other", {})])
+
+    documents = list(index.iter_range(page_size=2, prefix="id-"))
+    assert [doc.id for doc in documents] == [f"id-{i}" for i in range(5)]
+    assert [doc.content for doc in documents] == [{"data": i} for i in range(5)]
+
+    documents = list(index.iter_range(page_size=4, prefetch=0))
+    assert len(documents) == 6
+
+    page_size = AdaptivePageSize(1, max_size=4, target_latency=60.0)
+    documents = list(index.iter_range(page_size=page_size))
+    assert len(documents) == 6
+    assert page_size.size == 4
+
+
+def test_adaptive_page_size() -> None:
+    page_size = AdaptivePageSize(
+        100, min_size=10, max_size=400, target_latency=1.0, max_bytes=1000
+    )
+
+    # Pages larger than the maximum bytes shrink the size in proportion
+    page_size.observe(latency=0.1, size=4000)
+    assert page_size.size == 25
+
+    # Pages slower than the target latency shrink the size in proportion
+    page_size.size = 100
+    page_size.observe(latency=2.0, size=100)
+    assert page_size.size == 50
+
+    # The stricter of the two limits wins
+    page_size.size = 100
+    page_size.observe(latency=2.0, size=4000)
+    assert page_size.size == 25
+
+    # Pages within the limits, but not well within them, keep the size
+    page_size.size = 100
+    page_size.observe(latency=0.8, size=800)
+    assert page_size.size == 100
+
+    # The size is clamped at the minimum and maximum sizes
+    page_size.observe(latency=100.0, size=100)
+    assert page_size.size == 10
+
+    for _ in range(10):
+        page_size.observe(latency=0.1, size=100)
+    assert page_size.size == 400
+
+
+def test_merge_pages_depth() -> None:
+    fetched: t.List[int] = []
+
+    def scan() -> t.Iterator[RangeDocuments]:
+        for i in range(10):
+            fetched.append(i)
+            yield RangeDocuments(next_cursor=str(i + 1), documents=[])
+
+    pages = merge_pages([scan], concurrency=1, depth=2)
+    next(pages)
+    time.sleep(0.3)
+
+    # The page taken by the consumer and the two pages ahead of it
+    assert len(fetched) == 3
+
+    next(pages)
+    time.sleep(0.3)
+    assert len(fetched) == 4
+
+    assert len(list(pages)) == 8
+
+
+def test_iter_range_sharded(index: Index) -> None:
+    index.upsert(
+        [(f"a-{i}", {"data": i}) for i in range(5)]
+        + [(f"b-{i}", {"data": i}) for i in range(3)]
+        + [("other", {})]
+    )
+
+    documents = list(index.iter_range_sharded(["a-", "b-"], page_size=2))
+    assert sorted(doc.id for doc in documents) == sorted(
+        [f"a-{i}" for i in range(5)] + [f"b-{i}" for i in range(3)]
+    )
+
+    documents = list(index.iter_range_sharded(["a", "b", "o"], concurrency=2))
+    assert len(documents) == 9
+
+    with pytest.raises(ClientError):
+        list(index.iter_range_sharded(["a", "a-"]))
+
+
+def test_export(index: Index, tmp_path: pathlib.Path) -> None:
+    documents = [(f"id-{i}", {"data": i}, {"key": i}) for i in range(5)]
+    index.upsert(documents + [("other", {"data": "other"})])
+
+    path = tmp_path / "documents.jsonl"
+    assert index.export(path, prefix="id-", page_size=2) == 5
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+
+    assert records == [
+        {"id": f"id-{i}", "content": {"data": i}, "metadata": {"key": i}}
+        for i in range(5)
+    ]
+
+    # The exported file can be imported back
+    index.reset()
+    index.import_jsonl(path)
+    assert index.fetch(ids=["id-0"])[0] == Document(
+        id="id-0", content={"data": 0}, metadata={"key": 0}
+    )
+
+    # The prefixes are exported concurrently
+    path = tmp_path / "sharded.jsonl"
+    prefixes = ["id-0", "id-1", "id-2", "id-3", "id-4"]
+    assert index.export(path, prefixes=prefixes, concurrency=2, page_size=1) == 5
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+
+    assert sorted(records, key=lambda record: record["id"]) == [
+        {"id": f"id-{i}", "content": {"data": i}, "metadata": {"key": i}}
+        for i in range(5)
+    ]
+
+    with pytest.raises(ClientError):
+        index.export(path, prefix="id-", prefixes=prefixes)
+
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    path = tmp_path / "documents.parquet"
+    assert index.export(path, format="parquet", page_size=2) == 5
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.num_row_groups == 3
+    rows = parquet.read().to_pylist()
+    assert [row["id"] for row in rows] == [f"id-{i}" for i in range(5)]
+    assert [json.loads(row["content"]) for row in rows] == [
+        {"data": i} for i in range(5)
+    ]
+    assert [json.loads(row["metadata"]) for row in rows] == [
+        {"key": i} for i in range(5)
+    ]
+
+
+def test_export_failure(index: Index, tmp_path: pathlib.Path) -> None:
+    index = Search(url=URL, token=TOKEN, retries=0).index(INDEX_NAME)
+    index.upsert([(f"id-{i}", {"data": i}) for i in range(5)])
+
+    path = tmp_path / "documents.jsonl"
+    path.write_text("previous")
+
+    client = index._requester._client
+    pages: t.List[httpx.Request] = []
+
+    def fail_second_page(request: httpx.Request) -> httpx.Response:
+        if pages:
+            raise httpx.ConnectError("unavailable", request=request)
+
+        pages.append(request)
+        response = client.send(request)
+        return httpx.Response(response.status_code, content=response.content)
+
+    index._requester._client = httpx.Client(
+        transport=httpx.MockTransport(fail_second_page)
+    )
+    with pytest.raises(httpx.ConnectError):
+        index.export(path, page_size=2, prefetch=0)
+
+    # The previous file is kept, and the partial export is removed
+    assert path.read_text() == "previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+
 def test_reset(index: Index) -> None:
     index.upsert(
         documents=[
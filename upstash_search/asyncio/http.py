@@ -1,10 +1,16 @@
 import asyncio
+import functools
 import typing as t
 
 import httpx
 
+from upstash_search import codec
+from upstash_search.decoders import ResultDecoder
 from upstash_search.errors import UpstashError
-from upstash_search.http import generate_headers
+from upstash_search.http import RequestKeyT, encode_payload, generate_headers
+from upstash_search.paths import READ_PATHS
+
+T = t.TypeVar("T")
 
 
 class AsyncRequester:
@@ -15,6 +21,7 @@ class AsyncRequester:
         retries: int,
         retry_interval: float,
         allow_telemetry: bool,
+        single_flight: bool = False,
     ):
         self._client = httpx.AsyncClient(
             timeout=httpx.Timeout(
@@ -24,20 +31,80 @@ class AsyncRequester:
         )
         self._url = url
         self._headers = generate_headers(token, allow_telemetry)
+        self._json_headers = {**self._headers, "Content-Type": "application/json"}
         self._retries = retries
         self._retry_interval = retry_interval
 
+        # Identical read requests in flight, when single flight is enabled
+        self._in_flight: t.Optional[t.Dict[RequestKeyT, "asyncio.Future[t.Any]"]] = (
+            {} if single_flight else None
+        )
+
+    @t.overload
     async def post(
         self,
         path: str,
         payload: t.Optional[t.Any] = None,
         index: t.Optional[str] = None,
+        decoder: None = None,
+    ) -> t.Any: ...
+
+    @t.overload
+    async def post(
+        self,
+        path: str,
+        payload: t.Optional[t.Any] = None,
+        index: t.Optional[str] = None,
+        *,
+        decoder: ResultDecoder[T],
+    ) -> T: ...
+
+    async def post(
+        self,
+        path: str,
+        payload: t.Optional[t.Any] = None,
+        index: t.Optional[str] = None,
+        decoder: t.Optional[ResultDecoder[t.Any]] = None,
     ) -> t.Any:
         if index:
             url = f"{self._url}{path}/{index}"
         else:
             url = f"{self._url}{path}"
 
+        content = encode_payload(payload)
+        if self._in_flight is None or path not in READ_PATHS:
+            return await self._send(url, content, decoder)
+
+        key = (url, content, decoder)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send(url, content, decoder))
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._remove_in_flight, key))
+
+        # The request is shielded, so that cancelling one of
+        # the callers does not cancel it for the others.
+        return await asyncio.shield(task)
+
+    def _remove_in_flight(
+        self, key: RequestKeyT, task: "asyncio.Future[t.Any]"
+    ) -> None:
+        assert self._in_flight is not None
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        # Retrieve the error, in case all of the callers are cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _send(
+        self,
+        url: str,
+        content: t.Optional[bytes],
+        decoder: t.Optional[ResultDecoder[t.Any]],
+    ) -> t.Any:
+        headers = self._headers if content is None else self._json_headers
+
         response = None
         last_error = None
 
@@ -45,8 +112,8 @@ class AsyncRequester:
             try:
                 response = await self._client.post(
                     url=url,
-                    headers=self._headers,
-                    json=payload,
+                    headers=headers,
+                    content=content,
                 )
                 break
 
@@ -59,7 +126,10 @@ class AsyncRequester:
             assert last_error is not None
             raise last_error
 
-        body = response.json()
+        if decoder is not None:
+            return decoder.decode(response.content)
+
+        body = codec.loads(response.content)
         if "error" in body:
             raise UpstashError(body["error"])
 
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import typing as t
+
+from upstash_search.errors import BatchUpsertError
+from upstash_search.job import JobCheckpoint, checkpoint_path
+from upstash_search.types import UpsertBatchResult, UpsertDocumentT
+from upstash_search.utils import (
+    DEFAULT_BATCH_BYTES,
+    DEFAULT_BATCH_SIZE,
+    DocumentBatch,
+    aiter_in_thread,
+    batch_documents,
+    batch_jsonl,
+)
+
+if t.TYPE_CHECKING:
+    from upstash_search.asyncio.index import AsyncIndex
+
+
+class AsyncUpsertJob:
+    """
+    Bulk upsert that stores its progress in a checkpoint file,
+    so that it can be resumed after a failure.
+
+    Running a job again with the same id skips the part of the input
+    that is already acknowledged, and running a completed job again
+    does nothing. Resuming relies on the input being the same, and
+    in the same order, as in the previous runs.
+
+    ```python
+    job = index.job("nightly-reindex")
+    await job.import_jsonl("documents.jsonl")
+    ```
+    """
+
+    def __init__(
+        self,
+        index: "AsyncIndex",
+        job_id: str,
+        *,
+        checkpoint_dir: t.Union[str, "os.PathLike[str]"] = ".",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        concurrency: int = 1,
+    ):
+        self._index = index
+        self._path = checkpoint_path(checkpoint_dir, job_id)
+        self._batch_size = batch_size
+        self._max_batch_bytes = max_batch_bytes
+        self._concurrency = concurrency
+
+    def reset(self) -> None:
+        """
+        Removes the checkpoint of the job, so that the next run
+        starts from the beginning.
+        """
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+    async def upsert(
+        self, documents: t.Iterable[UpsertDocumentT]
+    ) -> t.List[UpsertBatchResult]:
+        """
+        Upserts(updates or inserts) the documents, skipping the ones
+        acknowledged in the previous runs of the job.
+
+        The results of the batches of this run are returned, and
+        `BatchUpsertError` is raised if any of them has failed.
+
+        :param documents: Documents to upsert.
+        """
+        checkpoint = await asyncio.to_thread(
+            JobCheckpoint, self._path, self._index.name, "documents"
+        )
+        if checkpoint.completed:
+            return []
+
+        batches = batch_documents(
+            documents,
+            self._batch_size,
+            self._max_batch_bytes,
+            offset=checkpoint.offset,
+        )
+        return await self._run(checkpoint, batches)
+
+    async def import_jsonl(
+        self,
+        path: t.Union[str, "os.PathLike[str]"],
+    ) -> t.List[UpsertBatchResult]:
+        """
+        Upserts(updates or inserts) documents read from a JSON Lines file,
+        skipping the lines acknowledged in the previous runs of the job.
+
+        The results of the batches of this run are returned, and
+        `BatchUpsertError` is raised if any of them has failed.
+
+        :param path: Path of the JSON Lines file.
+        """
+        checkpoint = await asyncio.to_thread(
+            JobCheckpoint, self._path, self._index.name, os.fspath(path)
+        )
+        if checkpoint.completed:
+            return []
+
+        batches = batch_jsonl(
+            path,
+            checkpoint.offset,
+            self._batch_size,
+            self._max_batch_bytes,
+        )
+        return await self._run(checkpoint, batches)
+
+    async def _run(
+        self,
+        checkpoint: JobCheckpoint,
+        batches: t.Iterable[DocumentBatch],
+    ) -> t.List[UpsertBatchResult]:
+        results = await self._index.upsert_batches(
+            aiter_in_thread(iter(batches)),
+            self._concurrency,
+            on_result=checkpoint.record,
+        )
+
+        if any(result.error is not None for result in results):
+            raise BatchUpsertError(results)
+
+        await asyncio.to_thread(checkpoint.complete)
+        return results
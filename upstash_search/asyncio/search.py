@@ -1,10 +1,31 @@
+import asyncio
 import os
+import time
 import typing as t
 
 from upstash_search.asyncio.http import AsyncRequester
 from upstash_search.asyncio.index import AsyncIndex
+from upstash_search.cache import SearchCache
+from upstash_search.errors import BatchUpsertError, ClientError
+from upstash_search.manifest import forget_documents
 from upstash_search.paths import LIST_INDEXES_PATH, DELETE_INDEX_PATH, INFO_PATH
-from upstash_search.types import Info, parse_info
+from upstash_search.ranges import AdaptivePageSize
+from upstash_search.results import NormalizationT, merge_index_results
+from upstash_search.types import (
+    Document,
+    DocumentScore,
+    IndexDocumentScore,
+    Info,
+    IngestSummary,
+    UpsertDocumentT,
+    parse_info,
+)
+from upstash_search.utils import (
+    DEFAULT_BATCH_BYTES,
+    DEFAULT_BATCH_SIZE,
+    abatch_documents,
+    summarize_batches,
+)
 
 
 class AsyncSearch:
@@ -20,6 +41,12 @@ class AsyncSearch:
     )
     index = client.index("INDEX_NAME")
     ```
+
+    Search results can be cached on the client by giving a
+    `SearchCache`. When `single_flight` is enabled, identical
+    search, fetch, range and info requests that are in flight
+    at the same time share a single request and its results,
+    which should then not be modified by the callers.
     """
 
     def __init__(
@@ -30,14 +57,18 @@ class AsyncSearch:
         retries: int = 3,
         retry_interval: float = 1.0,
         allow_telemetry: bool = True,
+        cache: t.Optional[SearchCache] = None,
+        single_flight: bool = False,
     ):
         self._url = url
+        self._cache = cache
         self._requester = AsyncRequester(
             url=url,
             token=token,
             retries=retries,
             retry_interval=retry_interval,
             allow_telemetry=allow_telemetry,
+            single_flight=single_flight,
         )
 
     def index(self, name: str) -> AsyncIndex:
@@ -50,7 +81,145 @@ class AsyncSearch:
         :param name: Name of the index.
         """
 
-        return AsyncIndex(name, self._requester)
+        return AsyncIndex(name, self._requester, self._cache)
+
+    async def search_indexes(
+        self,
+        names: t.Sequence[str],
+        query: str,
+        *,
+        limit: int = 10,
+        filter: str = "",
+        reranking: bool = False,
+        semantic_weight: float = 0.75,
+        input_enrichment: bool = True,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        weights: t.Optional[t.Mapping[str, float]] = None,
+        normalize: t.Optional[NormalizationT] = None,
+        concurrency: int = 8,
+    ) -> t.List[IndexDocumentScore]:
+        """
+        Searches the given indexes in parallel, and returns the
+        `limit` results with the highest scores across all of them,
+        tagged with their indexes.
+
+        Since the scores of different indexes are not always
+        comparable, they can be normalized per index before they
+        are merged, and weighted by their indexes.
+
+        :param names: Names of the indexes to search.
+        :param query: Query text to search for.
+        :param limit: Number of documents to return.
+        :param weights: Optional weights of the indexes, multiplied with
+            the scores of their results. The default weight is 1.
+        :param normalize: Optional method to normalize the scores of each index with;
+            `minmax` or `zscore`.
+        :param concurrency: Maximum number of indexes searched at the same time.
+
+        The rest of the parameters are the same as the ones of `Index.search`.
+        """
+        if concurrency < 1:
+            raise ClientError("The concurrency must be a positive integer.")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def search(name: str) -> t.List[DocumentScore]:
+            async with semaphore:
+                return await self.index(name).search(
+                    query,
+                    limit=limit,
+                    filter=filter,
+                    reranking=reranking,
+                    semantic_weight=semantic_weight,
+                    input_enrichment=input_enrichment,
+                    include_content=include_content,
+                    include_metadata=include_metadata,
+                )
+
+        names = list(dict.fromkeys(names))
+        results = await asyncio.gather(*(search(name) for name in names))
+
+        return merge_index_results(dict(zip(names, results)), limit, weights, normalize)
+
+    async def copy_index(
+        self,
+        source: str,
+        destination: str,
+        *,
+        transform: t.Optional[
+            t.Callable[[Document], t.Optional[UpsertDocumentT]]
+        ] = None,
+        prefix: t.Optional[str] = None,
+        page_size: t.Union[int, AdaptivePageSize, None] = None,
+        prefetch: int = 2,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        concurrency: int = 4,
+        raise_on_error: bool = True,
+    ) -> IngestSummary:
+        """
+        Copies the documents of the source index into the destination
+        index, optionally transforming each of them on the way.
+
+        The reading and the writing overlap: a background task ranges
+        over the source index up to `prefetch` pages ahead, while the
+        documents are split into batches the same way as in
+        `upsert_many` and sent by at most `concurrency` many tasks.
+
+        A failing batch does not stop the others. Once all the batches
+        are sent, `BatchUpsertError` is raised if any of them has failed,
+        unless `raise_on_error` is false. The returned summary reports
+        the failed batches along with the throughput of the copy.
+
+        ```python
+        summary = await client.copy_index(
+            "movies",
+            "movies-v2",
+            transform=lambda doc: (doc.id, {"title": doc.content["title"]}),
+        )
+        print(summary.documents_per_second)
+        ```
+
+        :param source: Name of the index to copy from.
+        :param destination: Name of the index to copy into.
+        :param transform: Optional function that returns the document to
+            upsert for each document of the source index, or `None` to skip it.
+        :param prefix: Optional document id prefix to copy.
+        :param page_size: Number of documents to fetch in each request, or an
+            `AdaptivePageSize` to tune it by the latency and the size of the pages.
+        :param prefetch: Maximum number of pages to fetch ahead of the writers.
+        :param batch_size: Maximum number of documents in a batch.
+        :param max_batch_bytes: Maximum size of a batch payload in bytes.
+            A single document larger than that is sent in a batch of its own.
+        :param concurrency: Maximum number of batches to send at the same time.
+        :param raise_on_error: Whether to raise `BatchUpsertError` when any of the batches
+            has failed, instead of only reporting the failures in the summary.
+        """
+        if source == destination:
+            raise ClientError("The source and destination indexes must be different.")
+
+        source_documents = self.index(source).iter_range(
+            prefix=prefix,
+            page_size=page_size,
+            prefetch=prefetch,
+            lazy=transform is None,
+        )
+
+        documents: t.AsyncIterable[UpsertDocumentT] = source_documents
+        if transform is not None:
+            documents = _transformed(source_documents, transform)
+
+        start = time.perf_counter()
+        results = await self.index(destination).upsert_batches(
+            abatch_documents(documents, batch_size, max_batch_bytes),
+            concurrency,
+        )
+
+        if raise_on_error and any(result.error is not None for result in results):
+            raise BatchUpsertError(results)
+
+        return summarize_batches(results, time.perf_counter() - start)
 
     async def list_indexes(self) -> t.List[str]:
         """
@@ -69,10 +238,16 @@ class AsyncSearch:
         :param name: Name of the index to delete.
         """
 
-        await self._requester.post(
-            path=DELETE_INDEX_PATH,
-            index=name,
-        )
+        try:
+            await self._requester.post(
+                path=DELETE_INDEX_PATH,
+                index=name,
+            )
+        finally:
+            if self._cache is not None:
+                self._cache.invalidate(name)
+
+            await asyncio.to_thread(forget_documents, name)
 
     async def info(self) -> Info:
         """
@@ -92,6 +267,8 @@ class AsyncSearch:
         retries: int = 3,
         retry_interval: float = 1.0,
         allow_telemetry: bool = True,
+        cache: t.Optional[SearchCache] = None,
+        single_flight: bool = False,
     ) -> "AsyncSearch":
         """
         Load the credentials from environment variables,
@@ -104,4 +281,16 @@ class AsyncSearch:
             retries=retries,
             retry_interval=retry_interval,
             allow_telemetry=allow_telemetry,
+            cache=cache,
+            single_flight=single_flight,
         )
+
+
+async def _transformed(
+    documents: t.AsyncIterable[Document],
+    transform: t.Callable[[Document], t.Optional[UpsertDocumentT]],
+) -> t.AsyncIterator[UpsertDocumentT]:
+    async for document in documents:
+        transformed = transform(document)
+        if transformed is not None:
+            yield transformed
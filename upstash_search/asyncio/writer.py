@@ -0,0 +1,234 @@
+import asyncio
+import typing as t
+from types import TracebackType
+
+from upstash_search.asyncio.http import AsyncRequester
+from upstash_search.cache import SearchCache
+from upstash_search.errors import ClientError
+from upstash_search.manifest import forget_documents
+from upstash_search.paths import DELETE_PATH, UPSERT_PATH
+from upstash_search.types import Document, UpsertDocumentT
+from upstash_search.utils import (
+    DEFAULT_BATCH_BYTES,
+    DEFAULT_BATCH_SIZE,
+    encode_document,
+)
+from upstash_search.writer import OperationsT, group_operations
+
+
+class AsyncBufferedWriter:
+    """
+    Buffers upserts and deletes of an index in memory, and sends them
+    in batches.
+
+    Pending operations are coalesced by document id, so that only the
+    latest upsert or delete of each document is sent. They are flushed
+    when `max_documents` many of them are buffered, when the serialized
+    documents reach `max_bytes`, every `flush_interval` seconds, and
+    when the writer is closed.
+
+    ```python
+    async with index.writer() as writer:
+        await writer.upsert(("id-0", {"data": 0}))
+        await writer.delete(ids=["id-1"])
+    ```
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requester: AsyncRequester,
+        *,
+        max_documents: int = DEFAULT_BATCH_SIZE,
+        max_bytes: int = DEFAULT_BATCH_BYTES,
+        flush_interval: t.Optional[float] = 1.0,
+        cache: t.Optional[SearchCache] = None,
+    ):
+        if max_documents < 1:
+            raise ClientError("The maximum documents must be a positive integer.")
+
+        if max_bytes < 1:
+            raise ClientError("The maximum bytes must be a positive integer.")
+
+        if flush_interval is not None and flush_interval <= 0:
+            raise ClientError("The flush interval must be positive.")
+
+        self._name = name
+        self._requester = requester
+        self._cache = cache
+        self._max_documents = max_documents
+        self._max_bytes = max_bytes
+        self._flush_interval = flush_interval
+
+        self._operations: OperationsT = {}
+        self._size = 0
+        self._error: t.Optional[Exception] = None
+        self._closed = False
+
+        # Keeps the flushes in order
+        self._flush_lock = asyncio.Lock()
+
+        # Started with the first operation, as it requires a running loop
+        self._flusher: t.Optional[asyncio.Task[None]] = None
+
+    async def upsert(
+        self,
+        documents: t.Union[UpsertDocumentT, t.Iterable[UpsertDocumentT]],
+    ) -> None:
+        """
+        Buffers documents to upsert(update or insert).
+
+        :param documents: Documents to upsert.
+        """
+        if isinstance(documents, (Document, dict, tuple)):
+            documents = [documents]
+
+        encoded_docs = [encode_document(doc) for doc in documents]
+
+        self._check_open()
+        for doc_id, encoded_doc in encoded_docs:
+            self._add_operation(doc_id, encoded_doc)
+
+        await self._flush_if_full()
+
+    async def delete(self, *, ids: t.Sequence[str]) -> None:
+        """
+        Buffers the deletion of the documents having the given ids.
+
+        :param ids: List of document ids to delete.
+        """
+        self._check_open()
+        for doc_id in ids:
+            self._add_operation(doc_id, None)
+
+        await self._flush_if_full()
+
+    async def flush(self) -> None:
+        """
+        Sends the pending operations.
+
+        Raises the error of a failed periodic flush, if there is any.
+        The operations that could not be sent are kept in the buffer,
+        to be sent with the next flush.
+        """
+        async with self._flush_lock:
+            error, self._error = self._error, None
+            if error is not None:
+                raise error
+
+            await self._send(self._take_operations())
+
+    async def close(self) -> None:
+        """
+        Stops the periodic flushes, and flushes the pending operations.
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+
+        await self.flush()
+
+    async def __aenter__(self) -> "AsyncBufferedWriter":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: t.Optional[t.Type[BaseException]],
+        exc_val: t.Optional[BaseException],
+        exc_tb: t.Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    def _add_operation(self, doc_id: str, encoded_doc: t.Optional[bytes]) -> None:
+        previous_doc = self._operations.pop(doc_id, None)
+        if previous_doc is not None:
+            self._size -= len(previous_doc)
+
+        self._operations[doc_id] = encoded_doc
+        if encoded_doc is not None:
+            self._size += len(encoded_doc)
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ClientError("The writer is closed.")
+
+        if self._flusher is None and self._flush_interval is not None:
+            self._flusher = asyncio.create_task(
+                self._flush_periodically(self._flush_interval)
+            )
+
+    async def _flush_if_full(self) -> None:
+        if (
+            len(self._operations) >= self._max_documents
+            or self._size >= self._max_bytes
+        ):
+            await self.flush()
+
+    async def _flush_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            async with self._flush_lock:
+                try:
+                    await self._send(self._take_operations())
+                except Exception as e:
+                    self._error = e
+
+    def _take_operations(self) -> OperationsT:
+        operations, self._operations, self._size = self._operations, {}, 0
+        return operations
+
+    async def _send(self, operations: OperationsT) -> None:
+        if not operations:
+            return
+
+        # Ids of the documents whose operations are sent
+        sent: t.Set[str] = set()
+
+        try:
+            for encoded_docs, ids in group_operations(
+                operations, self._max_documents, self._max_bytes
+            ):
+                if encoded_docs is not None:
+                    await self._requester.post(
+                        path=UPSERT_PATH,
+                        payload=encoded_docs,
+                        index=self._name,
+                    )
+                else:
+                    await self._requester.post(
+                        path=DELETE_PATH,
+                        payload={"ids": ids},
+                        index=self._name,
+                    )
+                    await asyncio.to_thread(forget_documents, self._name, ids)
+
+                sent.update(ids)
+        except BaseException:
+            self._restore_operations(
+                {
+                    doc_id: encoded_doc
+                    for doc_id, encoded_doc in operations.items()
+                    if doc_id not in sent
+                }
+            )
+            raise
+        finally:
+            if self._cache is not None:
+                self._cache.invalidate(self._name)
+
+    def _restore_operations(self, operations: OperationsT) -> None:
+        """
+        Puts the operations that could not be sent back into the buffer,
+        unless newer operations of the same documents are buffered since.
+        """
+        for doc_id, encoded_doc in operations.items():
+            if doc_id not in self._operations:
+                self._add_operation(doc_id, encoded_doc)
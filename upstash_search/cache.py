@@ -0,0 +1,161 @@
+import collections
+import copy
+import threading
+import time
+import typing as t
+
+from upstash_search.errors import ClientError
+from upstash_search.types import CacheStats
+
+# Index name, query, limit, filter, reranking, semantic weight,
+# input enrichment, include content, include metadata, content fields
+# and lazy decoding
+SearchKeyT = t.Tuple[
+    str,
+    str,
+    int,
+    str,
+    bool,
+    float,
+    bool,
+    bool,
+    bool,
+    t.Optional[t.Tuple[str, ...]],
+    bool,
+]
+
+
+class SearchCache:
+    """
+    In-memory cache of search results, with a bounded size,
+    least recently used eviction and expiry of the entries.
+
+    When given to the client, the searches of all of its indexes
+    are served from the cache. The entries of an index are
+    invalidated when the documents of the index are upserted,
+    deleted or reset through the same client. Changes made by other
+    clients are only seen once the entries expire.
+
+    The results are copied when they are cached and when they are
+    served, so that the callers can modify the results they get
+    without changing the cached ones. The raw JSON of the lazily
+    decoded results is shared by the copies until it is decoded.
+
+    ```python
+    from upstash_search.cache import SearchCache
+
+    cache = SearchCache(max_size=1024, ttl=60.0)
+    client = Search(url=..., token=..., cache=cache)
+    ```
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: t.Optional[float] = 60.0):
+        if max_size < 1:
+            raise ClientError("The maximum size must be a positive integer.")
+
+        if ttl is not None and ttl <= 0:
+            raise ClientError("The ttl must be positive.")
+
+        self._max_size = max_size
+        self._ttl = ttl
+
+        # Keys mapped to the expiry times and the results,
+        # in the order of their last use.
+        self._entries: t.OrderedDict[SearchKeyT, t.Tuple[float, t.List[t.Any]]] = (
+            collections.OrderedDict()
+        )
+
+        # Number of times each index is invalidated, so that results of
+        # the searches that race with the invalidation are not stored.
+        self._generations: t.Dict[str, int] = collections.defaultdict(int)
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: SearchKeyT) -> t.Optional[t.List[t.Any]]:
+        """
+        Returns a copy of the cached results for the key, if there
+        are any that have not expired.
+
+        :param key: Key of the search.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, results = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return copy.deepcopy(results)
+
+                del self._entries[key]
+
+            self._misses += 1
+            return None
+
+    def generation(self, index: str) -> int:
+        """
+        Returns the number of times the index is invalidated,
+        to be given to `set` with the results of a search.
+
+        :param index: Name of the index.
+        """
+        with self._lock:
+            return self._generations[index]
+
+    def set(self, key: SearchKeyT, results: t.List[t.Any], generation: int) -> None:
+        """
+        Caches the results of the search, unless the index is
+        invalidated since the search has started.
+
+        :param key: Key of the search.
+        :param results: Results of the search.
+        :param generation: Generation of the index before the search.
+        """
+        expires_at = (
+            time.monotonic() + self._ttl if self._ttl is not None else float("inf")
+        )
+
+        with self._lock:
+            if self._generations[key[0]] != generation:
+                return
+
+            self._entries[key] = (expires_at, copy.deepcopy(results))
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, index: t.Optional[str] = None) -> None:
+        """
+        Removes the cached results of the index, or of all
+        the indexes when no index is given.
+
+        :param index: Name of the index.
+        """
+        with self._lock:
+            if index is None:
+                for name in self._generations:
+                    self._generations[name] += 1
+
+                self._entries.clear()
+                return
+
+            self._generations[index] += 1
+            for key in [key for key in self._entries if key[0] == index]:
+                del self._entries[key]
+
+    def stats(self) -> CacheStats:
+        """
+        Returns the hit, miss and eviction counts of the cache.
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+            )
@@ -0,0 +1,95 @@
+"""
+JSON encoding and decoding of the request and response bodies.
+
+The fastest available codec is used: orjson if it is installed,
+then msgspec, and the standard library json module otherwise.
+The codec can be changed with `use_codec`.
+
+orjson decodes the integers wider than 64 bits as floats, losing
+their precision, so the orjson codec only encodes with orjson, and
+decodes with msgspec if it is installed, or with the standard
+library json module otherwise. Both of them decode such integers
+exactly.
+"""
+
+import json
+import typing as t
+
+from upstash_search.errors import ClientError
+
+CodecName = t.Literal["orjson", "msgspec", "json"]
+
+
+def _json_dumps(obj: t.Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _json_loads(data: t.Union[bytes, str]) -> t.Any:
+    return json.loads(data)
+
+
+def _orjson_codec() -> t.Tuple[t.Callable[[t.Any], bytes], t.Callable[[t.Any], t.Any]]:
+    import orjson
+
+    def dumps(obj: t.Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson does not support some of the values that
+            # the standard library does, such as very large integers
+            return _json_dumps(obj)
+
+    try:
+        import msgspec
+    except ImportError:
+        return dumps, _json_loads
+
+    return dumps, msgspec.json.Decoder().decode
+
+
+def _msgspec_codec() -> t.Tuple[t.Callable[[t.Any], bytes], t.Callable[[t.Any], t.Any]]:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: t.Any) -> bytes:
+        try:
+            return encoder.encode(obj)
+        except (TypeError, OverflowError):
+            return _json_dumps(obj)
+
+    return dumps, decoder.decode
+
+
+def use_codec(name: CodecName) -> None:
+    """
+    Sets the codec used for encoding the requests and decoding
+    the responses.
+
+    :param name: Name of the codec; orjson, msgspec or json.
+    """
+    global dumps, loads, codec_name
+
+    if name == "orjson":
+        dumps, loads = _orjson_codec()
+    elif name == "msgspec":
+        dumps, loads = _msgspec_codec()
+    elif name == "json":
+        dumps, loads = _json_dumps, _json_loads
+    else:
+        raise ClientError(f"Unsupported codec: {name}")
+
+    codec_name = name
+
+
+dumps: t.Callable[[t.Any], bytes] = _json_dumps
+loads: t.Callable[[t.Union[bytes, str]], t.Any] = _json_loads
+codec_name: CodecName = "json"
+
+for _name in ("orjson", "msgspec"):
+    try:
+        use_codec(_name)
+        break
+    except ImportError:
+        pass
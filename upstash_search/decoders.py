@@ -0,0 +1,346 @@
+"""
+Decoders of the results of the response bodies.
+
+When typed decoding is enabled with `use_typed_decoding`, which
+requires msgspec, the response bodies of the read paths are decoded
+straight into the result types in a single pass, without building the
+intermediate dicts first. Otherwise, the bodies are decoded with the
+codec, and the results are converted with the parse functions. The
+lazy decoders always decode into their result types when msgspec is
+installed, as they are only used when asked for.
+
+Responses that do not match the result types raise `UpstashError`.
+"""
+
+import copy
+import dataclasses
+import typing as t
+
+from upstash_search import codec
+from upstash_search.errors import ClientError, UpstashError
+from upstash_search.results import ResultSet
+from upstash_search.types import (
+    Document,
+    DocumentScore,
+    RangeDocuments,
+    parse_document,
+    parse_document_score,
+    parse_range_documents,
+)
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None  # type: ignore[assignment]
+
+T = t.TypeVar("T")
+
+typed_decoding = False
+
+
+def use_typed_decoding(enabled: bool) -> None:
+    """
+    Enables or disables decoding the response bodies straight
+    into the result types, which requires msgspec.
+
+    :param enabled: Whether to use the typed decoding.
+    """
+    global typed_decoding
+
+    if enabled and msgspec is None:
+        raise ClientError("Typed decoding requires msgspec to be installed.")
+
+    typed_decoding = enabled
+
+
+class ResultDecoder(t.Generic[T]):
+    """
+    Decodes the result of a response body into `T`.
+
+    :param parse: Converts the generic result into `T`.
+    :param result_type: Type that msgspec decodes the result into.
+    :param convert: Converts the result decoded by msgspec into `T`,
+        if it is not `T` already.
+    :param always_typed: Whether to decode into the result type whenever
+        msgspec is installed, even if typed decoding is not enabled.
+    """
+
+    def __init__(
+        self,
+        parse: t.Callable[[t.Any], T],
+        result_type: t.Any,
+        convert: t.Optional[t.Callable[[t.Any], T]] = None,
+        always_typed: bool = False,
+    ):
+        self._parse = parse
+        self._result_type = result_type
+        self._convert = convert
+        self._always_typed = always_typed
+        self._decoder: t.Optional[t.Any] = None
+
+    def decode(self, data: bytes) -> T:
+        if not typed_decoding and not (self._always_typed and msgspec is not None):
+            body = codec.loads(data)
+            if "error" in body:
+                raise UpstashError(body["error"])
+
+            return self._parse(body["result"])
+
+        if self._decoder is None:
+            response_type = msgspec.defstruct(
+                "Response",
+                [
+                    ("result", t.Optional[self._result_type], None),
+                    ("error", t.Optional[str], None),
+                ],
+            )
+            self._decoder = msgspec.json.Decoder(response_type)
+
+        try:
+            response = self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise UpstashError(f"Unexpected response: {e}") from e
+
+        if response.error is not None:
+            raise UpstashError(response.error)
+
+        if self._convert is not None:
+            return self._convert(response.result)
+
+        return response.result  # type: ignore[no-any-return]
+
+
+class MeasuredDecoder(ResultDecoder[T]):
+    """
+    Decoder that records the size of the last response body it
+    decodes, and delegates the decoding to the given decoder.
+    """
+
+    def __init__(self, decoder: ResultDecoder[T]):
+        self._inner = decoder
+        self.size = 0
+
+    def decode(self, data: bytes) -> T:
+        self.size = len(data)
+        return self._inner.decode(data)
+
+
+def _range_result_type(document_type: t.Any) -> t.Any:
+    if msgspec is None:  # pragma: no cover
+        return None
+
+    return msgspec.defstruct(
+        "RangeResult",
+        [("next_cursor", str), ("documents", t.List[document_type])],
+        rename={"next_cursor": "nextCursor", "documents": "vectors"},
+    )
+
+
+def _convert_range_result(result: t.Any) -> RangeDocuments:
+    return RangeDocuments(next_cursor=result.next_cursor, documents=result.documents)
+
+
+def _lazy_field(base: type, name: str) -> t.Any:
+    """
+    Returns a property that decodes the raw JSON of the field of the
+    base class on the first access, and stores it in the slot of the
+    field.
+    """
+    slot = base.__dict__[name]
+    raw_name = f"_raw_{name}"
+
+    def get(self: t.Any) -> t.Any:
+        raw = getattr(self, raw_name)
+        if raw is not None:
+            slot.__set__(self, msgspec.json.decode(raw))
+            setattr(self, raw_name, None)
+
+        return slot.__get__(self, type(self))
+
+    def set(self: t.Any, value: t.Any) -> None:
+        setattr(self, raw_name, None)
+        slot.__set__(self, value)
+
+    return property(get, set)
+
+
+def _lazy_eq(base: type) -> t.Callable[[t.Any, t.Any], t.Any]:
+    names = [field.name for field in dataclasses.fields(base)]
+
+    def eq(self: t.Any, other: t.Any) -> t.Any:
+        if not isinstance(other, base):
+            return NotImplemented
+
+        return all(getattr(self, name) == getattr(other, name) for name in names)
+
+    return eq
+
+
+def _lazy_deepcopy(base: type) -> t.Callable[[t.Any, t.Dict[int, t.Any]], t.Any]:
+    """
+    Returns a deep copy method that shares the raw JSON of the fields
+    that are not decoded yet, instead of decoding them.
+    """
+    names = [field.name for field in dataclasses.fields(base)]
+
+    def deepcopy(self: t.Any, memo: t.Dict[int, t.Any]) -> t.Any:
+        cls = type(self)
+        copied = object.__new__(cls)
+        for name in names:
+            slot = base.__dict__[name]
+            raw_name = f"_raw_{name}"
+            raw = getattr(self, raw_name, None)
+            if raw is not None:
+                # The raw JSON is never modified, so it is shared.
+                slot.__set__(copied, None)
+                setattr(copied, raw_name, raw)
+            else:
+                slot.__set__(copied, copy.deepcopy(slot.__get__(self, base), memo))
+                if hasattr(cls, raw_name):
+                    setattr(copied, raw_name, None)
+
+        return copied
+
+    return deepcopy
+
+
+class LazyDocument(Document):
+    """
+    Document that keeps its content and metadata as raw JSON,
+    and decodes them only when they are accessed.
+    """
+
+    __slots__ = ("_raw_content", "_raw_metadata")
+    _raw_content: t.Any
+    _raw_metadata: t.Any
+
+    content = _lazy_field(Document, "content")
+    metadata = _lazy_field(Document, "metadata")
+    __eq__ = _lazy_eq(Document)
+    __deepcopy__ = _lazy_deepcopy(Document)
+    __hash__ = None  # type: ignore[assignment]
+
+    def __reduce__(self) -> t.Tuple[t.Any, ...]:
+        return Document, (self.id, self.content, self.metadata)
+
+    def _raw_fields(self) -> t.Optional[t.Tuple[bytes, bytes]]:
+        """
+        Returns the raw JSON of the content and the metadata,
+        unless either of them is decoded already.
+        """
+        if self._raw_content is None or self._raw_metadata is None:
+            return None
+
+        return bytes(self._raw_content), bytes(self._raw_metadata)
+
+    @classmethod
+    def _from_row(cls, row: t.Any) -> "LazyDocument":
+        document = cls.__new__(cls)
+        document.id = row.id
+        document.metadata = None
+        document._raw_content = row.content
+        document._raw_metadata = row.metadata
+        return document
+
+
+class LazyDocumentScore(DocumentScore):
+    """
+    Document score that keeps its content and metadata as raw JSON,
+    and decodes them only when they are accessed.
+    """
+
+    __slots__ = ("_raw_content", "_raw_metadata")
+    _raw_content: t.Any
+    _raw_metadata: t.Any
+
+    content = _lazy_field(DocumentScore, "content")
+    metadata = _lazy_field(DocumentScore, "metadata")
+    __eq__ = _lazy_eq(DocumentScore)
+    __deepcopy__ = _lazy_deepcopy(DocumentScore)
+    __hash__ = None  # type: ignore[assignment]
+
+    def __reduce__(self) -> t.Tuple[t.Any, ...]:
+        return DocumentScore, (self.id, self.score, self.content, self.metadata)
+
+    @classmethod
+    def _from_row(cls, row: t.Any) -> "LazyDocumentScore":
+        document_score = cls.__new__(cls)
+        document_score.id = row.id
+        document_score.score = row.score
+        document_score.metadata = None
+        document_score._raw_content = row.content
+        document_score._raw_metadata = row.metadata
+        return document_score
+
+
+def _lazy_row_type(name: str, *fields: t.Tuple[str, t.Any]) -> t.Any:
+    if msgspec is None:  # pragma: no cover
+        return None
+
+    return msgspec.defstruct(
+        name,
+        [
+            ("id", str),
+            *fields,
+            ("content", msgspec.Raw, msgspec.Raw(b"{}")),
+            ("metadata", msgspec.Raw, msgspec.Raw(b"null")),
+        ],
+    )
+
+
+_LazyDocumentRow = _lazy_row_type("LazyDocumentRow")
+_LazyDocumentScoreRow = _lazy_row_type("LazyDocumentScoreRow", ("score", float))
+
+
+def _convert_lazy_range_result(result: t.Any) -> RangeDocuments:
+    return RangeDocuments(
+        next_cursor=result.next_cursor,
+        documents=[LazyDocument._from_row(row) for row in result.documents],
+    )
+
+
+search_decoder: ResultDecoder[t.List[DocumentScore]] = ResultDecoder(
+    lambda result: [parse_document_score(document_score) for document_score in result],
+    t.List[DocumentScore],
+)
+
+fetch_decoder: ResultDecoder[t.List[t.Optional[Document]]] = ResultDecoder(
+    lambda result: [parse_document(doc) if doc is not None else None for doc in result],
+    t.List[t.Optional[Document]],
+)
+
+range_decoder: ResultDecoder[RangeDocuments] = ResultDecoder(
+    parse_range_documents,
+    _range_result_type(Document),
+    _convert_range_result,
+)
+
+lazy_search_decoder: ResultDecoder[t.List[DocumentScore]] = ResultDecoder(
+    search_decoder._parse,
+    t.List[_LazyDocumentScoreRow],  # type: ignore[valid-type]
+    lambda rows: [LazyDocumentScore._from_row(row) for row in rows],
+    always_typed=True,
+)
+
+lazy_fetch_decoder: ResultDecoder[t.List[t.Optional[Document]]] = ResultDecoder(
+    fetch_decoder._parse,
+    t.List[t.Optional[_LazyDocumentRow]],  # type: ignore[valid-type]
+    lambda rows: [
+        LazyDocument._from_row(row) if row is not None else None for row in rows
+    ],
+    always_typed=True,
+)
+
+lazy_range_decoder: ResultDecoder[RangeDocuments] = ResultDecoder(
+    parse_range_documents,
+    _range_result_type(_LazyDocumentRow),
+    _convert_lazy_range_result,
+    always_typed=True,
+)
+
+columnar_search_decoder: ResultDecoder[ResultSet] = ResultDecoder(
+    ResultSet._from_results,
+    t.List[_LazyDocumentScoreRow],  # type: ignore[valid-type]
+    ResultSet._from_rows,
+    always_typed=True,
+)
@@ -1,6 +1,34 @@
+import typing as t
+
+from upstash_search.types import UpsertBatchResult
+
+
 class UpstashError(Exception):
     pass
 
 
 class ClientError(Exception):
     pass
+
+
+class BatchUpsertError(Exception):
+    """
+    Raised when some of the batches of a bulk upsert fail.
+
+    The results of all the batches, including the successful
+    ones, are available in `results`.
+    """
+
+    def __init__(self, results: t.List[UpsertBatchResult]):
+        self.results = results
+        self.failed = [result for result in results if result.error is not None]
+
+        reasons = "; ".join(
+            f"batch {result.batch}: {result.error}" for result in self.failed[:5]
+        )
+        if len(self.failed) > 5:
+            reasons += "; ..."
+
+        super().__init__(
+            f"{len(self.failed)} of {len(results)} batches failed to upsert: {reasons}"
+        )
@@ -0,0 +1,196 @@
+"""
+Writers of the documents exported from an index.
+
+The documents are written page by page as they are ranged over, so
+that only a single page is kept in memory at a time. The content and
+metadata of the lazily decoded documents are written as the raw JSON
+they are received in, without being decoded and encoded again.
+
+The documents are written to a temporary file next to the path,
+which replaces the file at the path only when the export completes,
+so that a failed export does not leave a partial file behind.
+"""
+
+import abc
+import contextlib
+import os
+import typing as t
+import uuid
+
+from upstash_search import codec
+from upstash_search.decoders import LazyDocument
+from upstash_search.errors import ClientError
+from upstash_search.types import Document
+from upstash_search.utils import encode_document
+
+try:
+    import pyarrow as pa  # type: ignore[import-untyped]
+    import pyarrow.parquet as pq  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+ExportFormatT = t.Literal["jsonl", "parquet"]
+
+
+class ExportWriter(abc.ABC):
+    """
+    Writes the pages of exported documents to a temporary file,
+    which replaces the file at the path when the writer is closed,
+    and is removed when the writer is aborted.
+    """
+
+    def __init__(self, path: t.Union[str, "os.PathLike[str]"]):
+        self._path = os.fspath(path)
+        self._temp_path = f"{self._path}.{uuid.uuid4().hex}.tmp"
+
+        try:
+            self._open(self._temp_path)
+        except BaseException:
+            self._remove()
+            raise
+
+    @abc.abstractmethod
+    def _open(self, path: str) -> None:
+        """
+        Opens the file to write the documents to.
+        """
+
+    @abc.abstractmethod
+    def write(self, documents: t.Sequence[Document]) -> None:
+        """
+        Writes a page of documents.
+        """
+
+    @abc.abstractmethod
+    def _close(self) -> None:
+        """
+        Closes the file the documents are written to.
+        """
+
+    def close(self) -> None:
+        """
+        Closes the file, and moves it to the path.
+        """
+        try:
+            self._close()
+            os.replace(self._temp_path, self._path)
+        except BaseException:
+            self._remove()
+            raise
+
+    def abort(self) -> None:
+        """
+        Closes the file, and removes it.
+        """
+        try:
+            self._close()
+        finally:
+            self._remove()
+
+    def _remove(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._temp_path)
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, exc_type: t.Any, *args: t.Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class JsonlWriter(ExportWriter):
+    """
+    Writes the documents as JSON Lines, in the format
+    that `import_jsonl` reads.
+    """
+
+    def _open(self, path: str) -> None:
+        self._file = open(path, "wb")
+
+    def write(self, documents: t.Sequence[Document]) -> None:
+        self._file.write(
+            b"".join(encode_document(document)[1] + b"\n" for document in documents)
+        )
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter(ExportWriter):
+    """
+    Writes the documents as Parquet, with a row group for each page.
+
+    The content and metadata are stored as JSON strings, since
+    their shapes can differ from one document to another.
+    """
+
+    def __init__(self, path: t.Union[str, "os.PathLike[str]"]):
+        if pa is None:
+            raise ClientError("Exporting to Parquet requires pyarrow to be installed.")
+
+        super().__init__(path)
+
+    def _open(self, path: str) -> None:
+        self._schema = pa.schema(
+            [
+                pa.field("id", pa.string(), nullable=False),
+                pa.field("content", pa.string(), nullable=False),
+                pa.field("metadata", pa.string()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, documents: t.Sequence[Document]) -> None:
+        if not documents:
+            return
+
+        ids = []
+        contents = []
+        metadata = []
+        for document in documents:
+            content, meta = _encode_fields(document)
+            ids.append(document.id)
+            contents.append(content.decode())
+            metadata.append(meta.decode() if meta != b"null" else None)
+
+        self._writer.write_table(
+            pa.table(
+                {"id": ids, "content": contents, "metadata": metadata},
+                schema=self._schema,
+            )
+        )
+
+    def _close(self) -> None:
+        self._writer.close()
+
+
+def open_writer(
+    path: t.Union[str, "os.PathLike[str]"],
+    format: ExportFormatT,
+) -> ExportWriter:
+    """
+    Returns the writer of the format, writing to the path.
+    """
+    if format == "jsonl":
+        return JsonlWriter(path)
+
+    if format == "parquet":
+        return ParquetWriter(path)
+
+    raise ClientError(f"Unsupported export format: {format}")
+
+
+def _encode_fields(document: Document) -> t.Tuple[bytes, bytes]:
+    """
+    Returns the content and the metadata of the document as JSON.
+    """
+    if isinstance(document, LazyDocument):
+        raw_fields = document._raw_fields()
+        if raw_fields is not None:
+            return raw_fields
+
+    return codec.dumps(document.content), codec.dumps(document.metadata)
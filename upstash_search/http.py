@@ -1,12 +1,21 @@
 import os
 import platform as p
+import threading
 import time
 import typing as t
+from concurrent.futures import Future
 
 import httpx
 
-from upstash_search import __version__
+from upstash_search import __version__, codec
+from upstash_search.decoders import ResultDecoder
 from upstash_search.errors import UpstashError
+from upstash_search.paths import READ_PATHS
+
+T = t.TypeVar("T")
+
+# Url, encoded payload and decoder of a request
+RequestKeyT = t.Tuple[str, t.Optional[bytes], t.Optional[ResultDecoder[t.Any]]]
 
 
 def generate_headers(token: str, allow_telemetry: bool) -> t.Dict[str, str]:
@@ -30,6 +39,13 @@ def generate_headers(token: str, allow_telemetry: bool) -> t.Dict[str, str]:
     return headers
 
 
+def encode_payload(payload: t.Optional[t.Any]) -> t.Optional[bytes]:
+    if payload is None or isinstance(payload, bytes):
+        return payload
+
+    return codec.dumps(payload)
+
+
 class Requester:
     def __init__(
         self,
@@ -38,6 +54,7 @@ class Requester:
         retries: int,
         retry_interval: float,
         allow_telemetry: bool,
+        single_flight: bool = False,
     ):
         self._client = httpx.Client(
             timeout=httpx.Timeout(
@@ -47,20 +64,82 @@ class Requester:
         )
         self._url = url
         self._headers = generate_headers(token, allow_telemetry)
+        self._json_headers = {**self._headers, "Content-Type": "application/json"}
         self._retries = retries
         self._retry_interval = retry_interval
 
+        # Identical read requests in flight, when single flight is enabled
+        self._in_flight: t.Optional[t.Dict[RequestKeyT, "Future[t.Any]"]] = (
+            {} if single_flight else None
+        )
+        self._in_flight_lock = threading.Lock()
+
+    @t.overload
+    def post(
+        self,
+        path: str,
+        payload: t.Optional[t.Any] = None,
+        index: t.Optional[str] = None,
+        decoder: None = None,
+    ) -> t.Any: ...
+
+    @t.overload
     def post(
         self,
         path: str,
         payload: t.Optional[t.Any] = None,
         index: t.Optional[str] = None,
+        *,
+        decoder: ResultDecoder[T],
+    ) -> T: ...
+
+    def post(
+        self,
+        path: str,
+        payload: t.Optional[t.Any] = None,
+        index: t.Optional[str] = None,
+        decoder: t.Optional[ResultDecoder[t.Any]] = None,
     ) -> t.Any:
         if index:
             url = f"{self._url}{path}/{index}"
         else:
             url = f"{self._url}{path}"
 
+        content = encode_payload(payload)
+        if self._in_flight is None or path not in READ_PATHS:
+            return self._send(url, content, decoder)
+
+        key = (url, content, decoder)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if future is None:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = self._send(url, content, decoder)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    def _send(
+        self,
+        url: str,
+        content: t.Optional[bytes],
+        decoder: t.Optional[ResultDecoder[t.Any]],
+    ) -> t.Any:
+        headers = self._headers if content is None else self._json_headers
+
         response = None
         last_error = None
 
@@ -68,8 +147,8 @@ class Requester:
             try:
                 response = self._client.post(
                     url=url,
-                    headers=self._headers,
-                    json=payload,
+                    headers=headers,
+                    content=content,
                 )
                 break
 
@@ -82,7 +161,10 @@ class Requester:
             assert last_error is not None
             raise last_error
 
-        body = response.json()
+        if decoder is not None:
+            return decoder.decode(response.content)
+
+        body = codec.loads(response.content)
         if "error" in body:
             raise UpstashError(body["error"])
 
@@ -1,6 +1,36 @@
+import copy
+import functools
+import os
+import time
 import typing as t
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
+from upstash_search.cache import SearchCache, SearchKeyT
+from upstash_search.decoders import (
+    MeasuredDecoder,
+    ResultDecoder,
+    columnar_search_decoder,
+    fetch_decoder,
+    lazy_fetch_decoder,
+    lazy_range_decoder,
+    lazy_search_decoder,
+    range_decoder,
+    search_decoder,
+)
+from upstash_search.errors import BatchUpsertError, ClientError
+from upstash_search.export import ExportFormatT, open_writer
 from upstash_search.http import Requester
+from upstash_search.job import UpsertJob
+from upstash_search.manifest import Manifest, forget_documents
+from upstash_search.ranges import (
+    AdaptivePageSize,
+    FetchPageT,
+    check_prefixes,
+    iter_pages,
+    merge_pages,
+    prefetch_pages,
+)
+from upstash_search.results import ResultSet
 from upstash_search.paths import (
     UPSERT_PATH,
     SEARCH_PATH,
@@ -13,13 +43,22 @@ from upstash_search.types import (
     DocumentScore,
     Document,
     RangeDocuments,
-    parse_document_score,
-    parse_document,
+    SearchQuery,
+    SearchResult,
     parse_deleted,
-    parse_range_documents,
+    UpsertBatchResult,
     UpsertDocumentT,
 )
-from upstash_search.utils import documents_to_payload
+from upstash_search.utils import (
+    DEFAULT_BATCH_BYTES,
+    DEFAULT_BATCH_SIZE,
+    DocumentBatch,
+    batch_changed_documents,
+    batch_documents,
+    batch_jsonl,
+    project_content,
+)
+from upstash_search.writer import BufferedWriter
 
 
 class Index:
@@ -34,13 +73,24 @@ class Index:
         self,
         name: str,
         requester: Requester,
+        cache: t.Optional[SearchCache] = None,
     ):
         self._name = name
         self._requester = requester
+        self._cache = cache
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the index.
+        """
+        return self._name
 
     def upsert(
         self,
-        documents: t.Union[UpsertDocumentT, t.List[UpsertDocumentT]],
+        documents: t.Union[UpsertDocumentT, t.Iterable[UpsertDocumentT]],
+        *,
+        manifest: t.Optional[Manifest] = None,
     ) -> None:
         """
         Upserts(updates or inserts) documents.
@@ -50,17 +100,343 @@ class Index:
         will be updated. Otherwise, a new document will be
         inserted.
 
+        Documents can be given as a single document, or as any
+        iterable of documents, such as a generator. Iterables are
+        consumed lazily and sent in batches, so that only a single
+        batch of documents is held in memory at a time. No request
+        is sent when there are no documents to upsert.
+
+        When a manifest is given, documents whose content and metadata
+        have not changed since they were last upserted with the same
+        manifest are skipped.
+
         :param documents: Documents to upsert.
+        :param manifest: Optional manifest of the content hashes of the
+            upserted documents.
         """
-        if not isinstance(documents, list):
+        if isinstance(documents, (str, bytes)):
+            raise ClientError(
+                "The documents must be a document or an iterable of documents."
+            )
+
+        if isinstance(documents, (Document, dict, tuple)):
             documents = [documents]
 
-        payload = documents_to_payload(documents)
+        for batch in self._batch_documents(
+            documents, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_BYTES, manifest
+        ):
+            try:
+                self._requester.post(
+                    path=UPSERT_PATH,
+                    payload=batch.payload,
+                    index=self._name,
+                )
+            finally:
+                self._invalidate_cache()
 
-        self._requester.post(
-            path=UPSERT_PATH,
-            payload=payload,
-            index=self._name,
+            if manifest is not None and batch.digests is not None:
+                manifest.update(self._name, batch.digests)
+
+    def upsert_many(
+        self,
+        documents: t.Iterable[UpsertDocumentT],
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        concurrency: int = 1,
+        manifest: t.Optional[Manifest] = None,
+    ) -> t.List[UpsertBatchResult]:
+        """
+        Upserts(updates or inserts) documents in batches.
+
+        Documents are split into batches, each having at most
+        `batch_size` many documents and at most `max_batch_bytes`
+        bytes of serialized payload. Batches are built lazily and
+        sent by at most `concurrency` many worker threads.
+
+        Upserts of the same document id are applied in the order
+        they appear in the input, even when they end up in different
+        batches that are sent concurrently. Within a batch, only the
+        latest upsert of a document id is sent.
+
+        A failing batch does not stop the others. Once all the
+        batches are sent, `BatchUpsertError` is raised if any of
+        them has failed, containing the results of all the batches.
+
+        When a manifest is given, documents whose content and metadata
+        have not changed since they were last upserted with the same
+        manifest are skipped, and the content hashes of the documents
+        in each successful batch are recorded in the manifest.
+
+        Returns the results of the batches, in the order of the input.
+
+        :param documents: Documents to upsert.
+        :param batch_size: Maximum number of documents in a batch.
+        :param max_batch_bytes: Maximum size of a batch payload in bytes.
+            A single document larger than that is sent in a batch of its own.
+        :param concurrency: Maximum number of batches to send at the same time.
+        :param manifest: Optional manifest of the content hashes of the
+            upserted documents.
+        """
+
+        results = self.upsert_batches(
+            self._batch_documents(documents, batch_size, max_batch_bytes, manifest),
+            concurrency,
+            manifest,
+        )
+
+        if any(result.error is not None for result in results):
+            raise BatchUpsertError(results)
+
+        return results
+
+    def import_jsonl(
+        self,
+        path: t.Union[str, "os.PathLike[str]"],
+        *,
+        offset: int = 0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        concurrency: int = 1,
+    ) -> t.List[UpsertBatchResult]:
+        """
+        Upserts(updates or inserts) documents read from a JSON Lines file.
+
+        Each line of the file must be a JSON object with the `id`,
+        `content`, and optionally `metadata` fields. The file is read
+        and parsed incrementally, and the lines are sent in batches
+        the same way as in `upsert_many`, without being re-encoded.
+
+        Each batch result contains the byte offset in the file right
+        after the last line of the batch. If the import fails with
+        `BatchUpsertError`, it can be resumed by passing the offset of
+        the last batch before the first failed one.
+
+        :param path: Path of the JSON Lines file.
+        :param offset: Byte offset in the file to start reading from.
+        :param batch_size: Maximum number of documents in a batch.
+        :param max_batch_bytes: Maximum size of a batch payload in bytes.
+            A single document larger than that is sent in a batch of its own.
+        :param concurrency: Maximum number of batches to send at the same time.
+        """
+
+        results = self.upsert_batches(
+            batch_jsonl(path, offset, batch_size, max_batch_bytes),
+            concurrency,
+        )
+
+        if any(result.error is not None for result in results):
+            raise BatchUpsertError(results)
+
+        return results
+
+    def upsert_batches(
+        self,
+        batches: t.Iterable[DocumentBatch],
+        concurrency: int,
+        manifest: t.Optional[Manifest] = None,
+        on_result: t.Optional[t.Callable[[UpsertBatchResult], None]] = None,
+    ) -> t.List[UpsertBatchResult]:
+        """
+        Upserts(updates or inserts) batches of serialized documents, as
+        built by the helpers in `upstash_search.utils`, and returns the
+        results of the batches.
+
+        This is the entry point for the jobs and the index copies, which
+        build the batches themselves. Most callers should use `upsert_many`
+        instead. Unlike it, failed batches do not raise an error, but
+        the errors raised by `on_result` or by updating the manifest do.
+
+        :param batches: Batches to upsert.
+        :param concurrency: Maximum number of batches to send at the same time.
+        :param manifest: Optional manifest to record the content hashes of
+            the documents in each successful batch.
+        :param on_result: Optional function called with the result of each batch.
+        """
+        if concurrency < 1:
+            raise ClientError("The concurrency must be a positive integer.")
+
+        if concurrency == 1:
+            return [
+                self._upsert_batch(i, batch, manifest, on_result)
+                for i, batch in enumerate(batches)
+            ]
+
+        return self._upsert_batches_concurrently(
+            enumerate(batches), concurrency, manifest, on_result
+        )
+
+    def _batch_documents(
+        self,
+        documents: t.Iterable[UpsertDocumentT],
+        batch_size: int,
+        max_batch_bytes: int,
+        manifest: t.Optional[Manifest],
+    ) -> t.Iterator[DocumentBatch]:
+        if manifest is None:
+            return batch_documents(documents, batch_size, max_batch_bytes)
+
+        return batch_changed_documents(
+            documents, manifest, self._name, batch_size, max_batch_bytes
+        )
+
+    def _upsert_batch(
+        self,
+        i: int,
+        batch: DocumentBatch,
+        manifest: t.Optional[Manifest] = None,
+        on_result: t.Optional[t.Callable[[UpsertBatchResult], None]] = None,
+    ) -> UpsertBatchResult:
+        result = UpsertBatchResult(
+            batch=i,
+            document_count=len(batch.ids),
+            size=len(batch.payload),
+            offset=batch.offset,
+        )
+
+        start = time.perf_counter()
+        try:
+            self._requester.post(
+                path=UPSERT_PATH,
+                payload=batch.payload,
+                index=self._name,
+            )
+        except Exception as e:
+            result.error = e
+        finally:
+            self._invalidate_cache()
+
+        result.latency = time.perf_counter() - start
+
+        if result.error is None and manifest is not None and batch.digests:
+            manifest.update(self._name, batch.digests)
+
+        if on_result is not None:
+            on_result(result)
+
+        return result
+
+    def _upsert_batches_concurrently(
+        self,
+        batches: t.Iterable[t.Tuple[int, DocumentBatch]],
+        concurrency: int,
+        manifest: t.Optional[Manifest],
+        on_result: t.Optional[t.Callable[[UpsertBatchResult], None]],
+    ) -> t.List[UpsertBatchResult]:
+        results: t.List[UpsertBatchResult] = []
+        in_flight: t.Dict[Future[UpsertBatchResult], t.List[str]] = {}
+
+        # The latest in-flight batch upserting each document id
+        latest: t.Dict[str, Future[UpsertBatchResult]] = {}
+
+        def collect(futures: t.Iterable[Future[UpsertBatchResult]]) -> None:
+            for future in futures:
+                for doc_id in in_flight.pop(future):
+                    if latest.get(doc_id) is future:
+                        del latest[doc_id]
+
+                results.append(future.result())
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for i, batch in batches:
+                dependencies = {
+                    latest[doc_id] for doc_id in batch.ids if doc_id in latest
+                }
+                if dependencies:
+                    wait(dependencies)
+
+                if len(in_flight) >= concurrency:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+                future = executor.submit(
+                    self._upsert_batch, i, batch, manifest, on_result
+                )
+                in_flight[future] = batch.ids
+                for doc_id in batch.ids:
+                    latest[doc_id] = future
+
+            collect(list(in_flight))
+
+        results.sort(key=lambda result: result.batch)
+        return results
+
+    def job(
+        self,
+        job_id: str,
+        *,
+        checkpoint_dir: t.Union[str, "os.PathLike[str]"] = ".",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        concurrency: int = 1,
+    ) -> UpsertJob:
+        """
+        Returns a bulk upsert job that stores its progress in a
+        checkpoint file named after the job id, so that it can be
+        resumed after a failure.
+
+        Running a job again with the same id skips the part of the
+        input that is already acknowledged. Batches are built and
+        sent the same way as in `upsert_many`.
+
+        ```python
+        job = index.job("nightly-reindex")
+        job.import_jsonl("documents.jsonl")
+        ```
+
+        :param job_id: Unique id of the job.
+        :param checkpoint_dir: Directory to store the checkpoint file in.
+        :param batch_size: Maximum number of documents in a batch.
+        :param max_batch_bytes: Maximum size of a batch payload in bytes.
+            A single document larger than that is sent in a batch of its own.
+        :param concurrency: Maximum number of batches to send at the same time.
+        """
+
+        return UpsertJob(
+            self,
+            job_id,
+            checkpoint_dir=checkpoint_dir,
+            batch_size=batch_size,
+            max_batch_bytes=max_batch_bytes,
+            concurrency=concurrency,
+        )
+
+    def writer(
+        self,
+        *,
+        max_documents: int = DEFAULT_BATCH_SIZE,
+        max_bytes: int = DEFAULT_BATCH_BYTES,
+        flush_interval: t.Optional[float] = 1.0,
+    ) -> BufferedWriter:
+        """
+        Returns a writer that buffers upserts and deletes in memory,
+        and sends them in batches.
+
+        Pending operations are coalesced by document id, so that
+        only the latest upsert or delete of each document is sent.
+        They are flushed when `max_documents` many of them are
+        buffered, when the serialized documents reach `max_bytes`,
+        every `flush_interval` seconds, and when the writer is closed.
+
+        ```python
+        with index.writer() as writer:
+            writer.upsert(("id-0", {"data": 0}))
+            writer.delete(ids=["id-1"])
+        ```
+
+        :param max_documents: Number of pending operations that triggers a flush.
+        :param max_bytes: Size of the pending documents in bytes that triggers a flush.
+        :param flush_interval: Interval of the periodic flushes in seconds,
+            or None to disable them.
+        """
+
+        return BufferedWriter(
+            self._name,
+            self._requester,
+            max_documents=max_documents,
+            max_bytes=max_bytes,
+            flush_interval=flush_interval,
+            cache=self._cache,
         )
 
     def search(
@@ -72,6 +448,10 @@ class Index:
         reranking: bool = False,
         semantic_weight: float = 0.75,
         input_enrichment: bool = True,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        content_fields: t.Optional[t.Sequence[str]] = None,
+        lazy: bool = False,
     ) -> t.List[DocumentScore]:
         """
         Searches for documents matching the given query text.
@@ -86,46 +466,194 @@ class Index:
             For instance, 0.2 applies 20% semantic matching with 80% full-text matching.
             You can learn more about how Upstash Search works from [our docs](https://upstash.com/docs/search/features/algorithm).
         :param inputEnrichment: Optional boolean to enhance queries before searching (enabled by default).
+        :param include_content: Whether to return the content of the documents. When it is false,
+            the content of the documents is empty.
+        :param include_metadata: Whether to return the metadata of the documents. When it is false,
+            the metadata of the documents is None.
+        :param content_fields: Optional top level content fields to keep, dropping the rest of the content.
+            The projection is applied on the client side, as the API returns the whole content.
+        :param lazy: Whether to decode the content and metadata of the documents only when they are accessed.
+            It requires msgspec to be installed, and has no effect otherwise.
         """
 
+        cache_key: t.Optional[SearchKeyT] = None
+        generation = 0
+        if self._cache is not None:
+            cache_key = (
+                self._name,
+                query,
+                limit,
+                filter,
+                reranking,
+                semantic_weight,
+                input_enrichment,
+                include_content,
+                include_metadata,
+                tuple(content_fields) if content_fields is not None else None,
+                lazy,
+            )
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            generation = self._cache.generation(self._name)
+
         payload = {
             "query": query,
             "topK": limit,
             "filter": filter,
             "reranking": reranking,
-            "includeData": True,
-            "includeMetadata": True,
+            "includeData": include_content,
+            "includeMetadata": include_metadata,
             "semanticWeight": semantic_weight,
             "inputEnrichment": input_enrichment,
         }
 
-        result = self._requester.post(
+        document_scores = self._requester.post(
             path=SEARCH_PATH,
             payload=payload,
             index=self._name,
+            decoder=lazy_search_decoder if lazy else search_decoder,
         )
 
-        document_scores = [
-            parse_document_score(document_score) for document_score in result
-        ]
+        if content_fields is not None:
+            document_scores = [
+                project_content(document_score, content_fields)
+                for document_score in document_scores
+            ]
+
+        if self._cache is not None and cache_key is not None:
+            self._cache.set(cache_key, document_scores, generation)
+
         return document_scores
 
+    def search_many(
+        self,
+        queries: t.Sequence[t.Union[str, SearchQuery]],
+        *,
+        concurrency: int = 8,
+    ) -> t.List[SearchResult]:
+        """
+        Runs the searches concurrently, and returns their results
+        in the order of the queries.
+
+        A failed search does not fail the others. Its error is
+        returned in the `error` of its result instead.
+
+        ```python
+        results = index.search_many(
+            ["query", SearchQuery("another query", limit=5)],
+            concurrency=16,
+        )
+        ```
+
+        :param queries: Query texts, or queries with the parameters of `search`.
+        :param concurrency: Maximum number of searches running at the same time.
+        """
+        if concurrency < 1:
+            raise ClientError("The concurrency must be a positive integer.")
+
+        if concurrency == 1:
+            return [self._search_query(query) for query in queries]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(self._search_query, queries))
+
+    def _search_query(self, query: t.Union[str, SearchQuery]) -> SearchResult:
+        if isinstance(query, str):
+            query = SearchQuery(query)
+
+        result = SearchResult(query)
+        try:
+            result.document_scores = self.search(
+                query.query,
+                limit=query.limit,
+                filter=query.filter,
+                reranking=query.reranking,
+                semantic_weight=query.semantic_weight,
+                input_enrichment=query.input_enrichment,
+                include_content=query.include_content,
+                include_metadata=query.include_metadata,
+                content_fields=query.content_fields,
+            )
+        except Exception as e:
+            result.error = e
+
+        return result
+
+    def search_columnar(
+        self,
+        query: str,
+        *,
+        limit: int = 10,
+        filter: str = "",
+        reranking: bool = False,
+        semantic_weight: float = 0.75,
+        input_enrichment: bool = True,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        content_fields: t.Optional[t.Sequence[str]] = None,
+    ) -> ResultSet:
+        """
+        Searches for documents matching the given query text, and
+        returns the results as a columnar `ResultSet`.
+
+        The columns are built straight from the response, and the
+        results are not served from, or stored in, the search cache.
+
+        The parameters are the same as the ones of `search`.
+        """
+        payload = {
+            "query": query,
+            "topK": limit,
+            "filter": filter,
+            "reranking": reranking,
+            "includeData": include_content,
+            "includeMetadata": include_metadata,
+            "semanticWeight": semantic_weight,
+            "inputEnrichment": input_enrichment,
+        }
+
+        result_set = self._requester.post(
+            path=SEARCH_PATH,
+            payload=payload,
+            index=self._name,
+            decoder=columnar_search_decoder,
+        )
+
+        if content_fields is not None:
+            result_set = result_set._project(content_fields)
+
+        return result_set
+
     def fetch(
         self,
         *,
         ids: t.Optional[t.Sequence[str]] = None,
         prefix: t.Optional[str] = None,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        content_fields: t.Optional[t.Sequence[str]] = None,
+        lazy: bool = False,
     ) -> t.List[t.Optional[Document]]:
         """
         Fetches documents for the given ids or id prefix.
 
         :param ids: List of document ids to fetch.
         :param prefix: Prefix of the document ids to fetch.
+        :param include_content: Whether to return the content of the documents. When it is false,
+            the content of the documents is empty.
+        :param include_metadata: Whether to return the metadata of the documents. When it is false,
+            the metadata of the documents is None.
+        :param content_fields: Optional top level content fields to keep, dropping the rest of the content.
+            The projection is applied on the client side, as the API returns the whole content.
+        :param lazy: Whether to decode the content and metadata of the documents only when they are accessed.
+            It requires msgspec to be installed, and has no effect otherwise.
         """
 
         payload: t.Dict[str, t.Any] = {
-            "includeData": True,
-            "includeMetadata": True,
+            "includeData": include_content,
+            "includeMetadata": include_metadata,
         }
 
         if ids is not None:
@@ -134,13 +662,19 @@ class Index:
         if prefix is not None:
             payload["prefix"] = prefix
 
-        result = self._requester.post(
+        documents = self._requester.post(
             path=FETCH_PATH,
             payload=payload,
             index=self._name,
+            decoder=lazy_fetch_decoder if lazy else fetch_decoder,
         )
 
-        documents = [parse_document(doc) if doc is not None else None for doc in result]
+        if content_fields is not None:
+            documents = [
+                project_content(doc, content_fields) if doc is not None else None
+                for doc in documents
+            ]
+
         return documents
 
     def delete(
@@ -171,11 +705,18 @@ class Index:
         if filter is not None:
             payload["filter"] = filter
 
-        result = self._requester.post(
-            path=DELETE_PATH,
-            payload=payload,
-            index=self._name,
-        )
+        try:
+            result = self._requester.post(
+                path=DELETE_PATH,
+                payload=payload,
+                index=self._name,
+            )
+        finally:
+            self._invalidate_cache()
+
+            # Without the prefix and the filter, only the ids are deleted
+            forgotten_ids = ids if prefix is None and filter is None else None
+            forget_documents(self._name, forgotten_ids)
 
         deleted = parse_deleted(result)
         return deleted
@@ -186,6 +727,10 @@ class Index:
         cursor: str = "",
         limit: int = 1,
         prefix: t.Optional[str] = None,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        content_fields: t.Optional[t.Sequence[str]] = None,
+        lazy: bool = False,
     ) -> RangeDocuments:
         """
         Ranges over the documents, starting from the cursor,
@@ -197,35 +742,371 @@ class Index:
         :param cursor: Cursor to start range from.
         :param limit: At most how many documents to return.
         :param prefix: Optional document id prefix to range over.
+        :param include_content: Whether to return the content of the documents. When it is false,
+            the content of the documents is empty.
+        :param include_metadata: Whether to return the metadata of the documents. When it is false,
+            the metadata of the documents is None.
+        :param content_fields: Optional top level content fields to keep, dropping the rest of the content.
+            The projection is applied on the client side, as the API returns the whole content.
+        :param lazy: Whether to decode the content and metadata of the documents only when they are accessed.
+            It requires msgspec to be installed, and has no effect otherwise.
         """
 
+        return self._range(
+            cursor,
+            limit,
+            prefix,
+            include_content,
+            include_metadata,
+            content_fields,
+            lazy_range_decoder if lazy else range_decoder,
+        )
+
+    def _range(
+        self,
+        cursor: str,
+        limit: int,
+        prefix: t.Optional[str],
+        include_content: bool,
+        include_metadata: bool,
+        content_fields: t.Optional[t.Sequence[str]],
+        decoder: ResultDecoder[RangeDocuments],
+    ) -> RangeDocuments:
         payload = {
             "cursor": cursor,
             "limit": limit,
-            "includeData": True,
-            "includeMetadata": True,
+            "includeData": include_content,
+            "includeMetadata": include_metadata,
         }
 
         if prefix is not None:
             payload["prefix"] = prefix
 
-        result = self._requester.post(
+        range_documents = self._requester.post(
             path=RANGE_PATH,
             payload=payload,
             index=self._name,
+            decoder=decoder,
         )
 
-        range_documents = parse_range_documents(result)
+        if content_fields is not None:
+            range_documents = RangeDocuments(
+                next_cursor=range_documents.next_cursor,
+                documents=[
+                    project_content(doc, content_fields)
+                    for doc in range_documents.documents
+                ],
+            )
+
         return range_documents
 
+    def iter_range(
+        self,
+        *,
+        cursor: str = "",
+        page_size: t.Union[int, AdaptivePageSize, None] = None,
+        prefix: t.Optional[str] = None,
+        prefetch: int = 1,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        content_fields: t.Optional[t.Sequence[str]] = None,
+        lazy: bool = False,
+    ) -> t.Iterator[Document]:
+        """
+        Ranges over all of the documents, starting from the cursor,
+        and yields them one by one.
+
+        The next pages are fetched in the background while the
+        current one is consumed, up to `prefetch` many pages ahead.
+
+        ```python
+        for document in index.iter_range(prefix="movie-"):
+            print(document.id)
+        ```
+
+        :param cursor: Cursor to start range from.
+        :param page_size: Number of documents to fetch in each request, or an
+            `AdaptivePageSize` to tune it by the latency and the size of the pages.
+            By default, the page size is tuned with the default `AdaptivePageSize`.
+        :param prefix: Optional document id prefix to range over.
+        :param prefetch: Maximum number of pages to fetch ahead of the consumer,
+            or 0 to fetch the next page only when the current one is consumed.
+
+        The rest of the parameters are the same as the ones of `range`.
+        """
+        for page in self._range_pages(
+            cursor,
+            page_size,
+            prefix,
+            prefetch,
+            include_content,
+            include_metadata,
+            content_fields,
+            lazy,
+        ):
+            yield from page.documents
+
+    def iter_range_sharded(
+        self,
+        prefixes: t.Sequence[str],
+        *,
+        concurrency: int = 4,
+        page_size: t.Optional[int] = None,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        content_fields: t.Optional[t.Sequence[str]] = None,
+        lazy: bool = False,
+    ) -> t.Iterator[Document]:
+        """
+        Ranges over the documents whose ids start with one of the
+        prefixes, walking the range cursors of the prefixes concurrently,
+        and yields the documents one by one in the order they are fetched.
+
+        The prefixes must be disjoint, so that no document is yielded
+        more than once, and they should cover all of the document ids to
+        range over all of the documents. For example, the ids generated
+        from hexadecimal digits are covered by the 16 prefixes from "0"
+        to "f".
+
+        ```python
+        for document in index.iter_range_sharded(["a", "b", "c"]):
+            print(document.id)
+        ```
+
+        :param prefixes: Disjoint document id prefixes to range over.
+        :param concurrency: Maximum number of prefixes to range over at once.
+        :param page_size: Number of documents to fetch in each request. By default,
+            the page size of each prefix is tuned with the default `AdaptivePageSize`.
+
+        The rest of the parameters are the same as the ones of `range`.
+        """
+        pages = self._sharded_pages(
+            prefixes,
+            concurrency,
+            page_size,
+            include_content,
+            include_metadata,
+            content_fields,
+            lazy,
+        )
+
+        for page in pages:
+            yield from page.documents
+
+    def export(
+        self,
+        path: t.Union[str, "os.PathLike[str]"],
+        *,
+        format: ExportFormatT = "jsonl",
+        prefix: t.Optional[str] = None,
+        prefixes: t.Optional[t.Sequence[str]] = None,
+        concurrency: int = 4,
+        page_size: t.Union[int, AdaptivePageSize, None] = None,
+        prefetch: int = 1,
+    ) -> int:
+        """
+        Exports the documents to a file, and returns the number
+        of documents exported.
+
+        The documents are ranged over page by page, and each page is
+        written to the file before the next one is processed, so the
+        memory usage does not grow with the size of the index.
+
+        When `prefixes` are given, the range cursors of the prefixes are
+        walked concurrently, as in `iter_range_sharded`, and the pages
+        are written in the order they are fetched.
+
+        The documents are written to a temporary file, which replaces
+        the file at the path once all of them are written. When the
+        export fails, the temporary file is removed.
+
+        The JSON Lines files can be imported back with `import_jsonl`.
+        The Parquet files, which require pyarrow, have a row group for
+        each page, with the `id` column and the `content` and `metadata`
+        columns as JSON strings.
+
+        ```python
+        count = index.export("documents.jsonl")
+        ```
+
+        :param path: Path of the file to write.
+        :param format: `jsonl` or `parquet`.
+        :param prefix: Optional document id prefix to export.
+        :param prefixes: Optional disjoint document id prefixes to export concurrently,
+            instead of walking a single range cursor.
+        :param concurrency: Maximum number of prefixes to range over at once.
+
+        The rest of the parameters are the same as the ones of `iter_range`.
+        """
+        pages: t.Iterator[RangeDocuments]
+        if prefixes is not None:
+            if prefix is not None:
+                raise ClientError("Either a prefix or prefixes can be given, not both.")
+
+            pages = self._sharded_pages(
+                prefixes,
+                concurrency,
+                page_size,
+                include_content=True,
+                include_metadata=True,
+                content_fields=None,
+                lazy=True,
+            )
+        else:
+            pages = self._range_pages(
+                cursor="",
+                page_size=page_size,
+                prefix=prefix,
+                prefetch=prefetch,
+                include_content=True,
+                include_metadata=True,
+                content_fields=None,
+                lazy=True,
+            )
+
+        count = 0
+        with open_writer(path, format) as writer:
+            for page in pages:
+                writer.write(page.documents)
+                count += len(page.documents)
+
+        return count
+
+    def _range_pages(
+        self,
+        cursor: str,
+        page_size: t.Union[int, AdaptivePageSize, None],
+        prefix: t.Optional[str],
+        prefetch: int,
+        include_content: bool,
+        include_metadata: bool,
+        content_fields: t.Optional[t.Sequence[str]],
+        lazy: bool,
+    ) -> t.Iterator[RangeDocuments]:
+        if isinstance(page_size, int) and page_size < 1:
+            raise ClientError("The page size must be a positive integer.")
+
+        if prefetch < 0:
+            raise ClientError("The prefetch must be a non-negative integer.")
+
+        if page_size is None:
+            page_size = AdaptivePageSize()
+
+        fetch = self._page_fetcher(
+            page_size,
+            prefix,
+            include_content,
+            include_metadata,
+            content_fields,
+            lazy,
+        )
+
+        if prefetch > 0:
+            pages = prefetch_pages(fetch, cursor, prefetch)
+        else:
+            pages = iter_pages(fetch, cursor)
+
+        return pages
+
+    def _sharded_pages(
+        self,
+        prefixes: t.Sequence[str],
+        concurrency: int,
+        page_size: t.Union[int, AdaptivePageSize, None],
+        include_content: bool,
+        include_metadata: bool,
+        content_fields: t.Optional[t.Sequence[str]],
+        lazy: bool,
+    ) -> t.Iterator[RangeDocuments]:
+        if concurrency < 1:
+            raise ClientError("The concurrency must be a positive integer.")
+
+        if isinstance(page_size, int) and page_size < 1:
+            raise ClientError("The page size must be a positive integer.")
+
+        check_prefixes(prefixes)
+
+        def prefix_page_size() -> t.Union[int, AdaptivePageSize]:
+            # Each prefix tunes its own page size
+            if page_size is None:
+                return AdaptivePageSize()
+
+            return copy.copy(page_size)
+
+        scans = [
+            functools.partial(
+                iter_pages,
+                self._page_fetcher(
+                    prefix_page_size(),
+                    prefix,
+                    include_content,
+                    include_metadata,
+                    content_fields,
+                    lazy,
+                ),
+                "",
+            )
+            for prefix in prefixes
+        ]
+
+        return merge_pages(scans, concurrency, concurrency)
+
+    def _page_fetcher(
+        self,
+        page_size: t.Union[int, AdaptivePageSize],
+        prefix: t.Optional[str],
+        include_content: bool,
+        include_metadata: bool,
+        content_fields: t.Optional[t.Sequence[str]],
+        lazy: bool,
+    ) -> FetchPageT:
+        decoder = lazy_range_decoder if lazy else range_decoder
+
+        def fetch(cursor: str) -> RangeDocuments:
+            if isinstance(page_size, int):
+                return self._range(
+                    cursor,
+                    page_size,
+                    prefix,
+                    include_content,
+                    include_metadata,
+                    content_fields,
+                    decoder,
+                )
+
+            measured_decoder = MeasuredDecoder(decoder)
+            start = time.perf_counter()
+            page = self._range(
+                cursor,
+                page_size.size,
+                prefix,
+                include_content,
+                include_metadata,
+                content_fields,
+                measured_decoder,
+            )
+
+            page_size.observe(time.perf_counter() - start, measured_decoder.size)
+            return page
+
+        return fetch
+
     def reset(self) -> None:
         """
         Deletes all documents from the index
         and resets it to its initial state.
         """
 
-        self._requester.post(
-            path=RESET_PATH,
-            payload=None,
-            index=self._name,
-        )
+        try:
+            self._requester.post(
+                path=RESET_PATH,
+                payload=None,
+                index=self._name,
+            )
+        finally:
+            self._invalidate_cache()
+            forget_documents(self._name)
+
+    def _invalidate_cache(self) -> None:
+        if self._cache is not None:
+            self._cache.invalidate(self._name)
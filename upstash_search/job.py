@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import typing as t
+
+from upstash_search.errors import BatchUpsertError, ClientError
+from upstash_search.types import UpsertBatchResult, UpsertDocumentT
+from upstash_search.utils import (
+    DEFAULT_BATCH_BYTES,
+    DEFAULT_BATCH_SIZE,
+    DocumentBatch,
+    batch_documents,
+    batch_jsonl,
+)
+
+if t.TYPE_CHECKING:
+    from upstash_search.index import Index
+
+
+class JobCheckpoint:
+    """
+    Progress of an upsert job, stored in a JSON file.
+
+    The offset is the position in the input up to which all the
+    batches are acknowledged. For documents, it is the number of
+    documents, and for JSON Lines files, it is the byte offset.
+    It only advances past contiguous successful batches, so a
+    failed batch holds it back even if the later ones succeed.
+    """
+
+    def __init__(
+        self,
+        path: t.Union[str, "os.PathLike[str]"],
+        index: str,
+        source: str,
+    ):
+        self._path = path
+        self._index = index
+        self._source = source
+        self._lock = threading.Lock()
+
+        self.offset = 0
+        self.completed = False
+
+        state = self._read()
+        if state is not None:
+            if state["index"] != index or state["source"] != source:
+                raise ClientError(
+                    f"The checkpoint at {os.fspath(path)} belongs to a job "
+                    f"of the index {state['index']} reading {state['source']}."
+                )
+
+            self.offset = state["offset"]
+            self.completed = state["completed"]
+
+        # Successful batches that are not yet contiguous with the offset
+        self._acknowledged: t.Dict[int, int] = {}
+        self._next_batch = 0
+
+    def record(self, result: UpsertBatchResult) -> None:
+        """
+        Records the result of the batch, and advances the offset
+        if the batch fills the gap after it.
+        """
+        if result.error is not None or result.offset is None:
+            return
+
+        with self._lock:
+            self._acknowledged[result.batch] = result.offset
+            if self._next_batch not in self._acknowledged:
+                return
+
+            while self._next_batch in self._acknowledged:
+                self.offset = self._acknowledged.pop(self._next_batch)
+                self._next_batch += 1
+
+            self._write()
+
+    def complete(self) -> None:
+        """
+        Marks the job as completed.
+        """
+        with self._lock:
+            self.completed = True
+            self._write()
+
+    def _read(self) -> t.Optional[t.Dict[str, t.Any]]:
+        try:
+            with open(self._path) as f:
+                return json.load(f)  # type: ignore[no-any-return]
+        except FileNotFoundError:
+            return None
+
+    def _write(self) -> None:
+        state = {
+            "index": self._index,
+            "source": self._source,
+            "offset": self.offset,
+            "completed": self.completed,
+        }
+
+        # Replace the file atomically, so that a crash while
+        # writing it does not lose the previous checkpoint.
+        tmp_path = f"{os.fspath(self._path)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+
+        os.replace(tmp_path, self._path)
+
+
+def checkpoint_path(
+    checkpoint_dir: t.Union[str, "os.PathLike[str]"],
+    job_id: str,
+) -> str:
+    return os.path.join(checkpoint_dir, f"{job_id}.checkpoint.json")
+
+
+class UpsertJob:
+    """
+    Bulk upsert that stores its progress in a checkpoint file,
+    so that it can be resumed after a failure.
+
+    Running a job again with the same id skips the part of the input
+    that is already acknowledged, and running a completed job again
+    does nothing. Resuming relies on the input being the same, and
+    in the same order, as in the previous runs.
+
+    ```python
+    job = index.job("nightly-reindex")
+    job.import_jsonl("documents.jsonl")
+    ```
+    """
+
+    def __init__(
+        self,
+        index: "Index",
+        job_id: str,
+        *,
+        checkpoint_dir: t.Union[str, "os.PathLike[str]"] = ".",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        concurrency: int = 1,
+    ):
+        self._index = index
+        self._path = checkpoint_path(checkpoint_dir, job_id)
+        self._batch_size = batch_size
+        self._max_batch_bytes = max_batch_bytes
+        self._concurrency = concurrency
+
+    def reset(self) -> None:
+        """
+        Removes the checkpoint of the job, so that the next run
+        starts from the beginning.
+        """
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+    def upsert(
+        self, documents: t.Iterable[UpsertDocumentT]
+    ) -> t.List[UpsertBatchResult]:
+        """
+        Upserts(updates or inserts) the documents, skipping the ones
+        acknowledged in the previous runs of the job.
+
+        The results of the batches of this run are returned, and
+        `BatchUpsertError` is raised if any of them has failed.
+
+        :param documents: Documents to upsert.
+        """
+        checkpoint = JobCheckpoint(self._path, self._index.name, "documents")
+        if checkpoint.completed:
+            return []
+
+        batches = batch_documents(
+            documents,
+            self._batch_size,
+            self._max_batch_bytes,
+            offset=checkpoint.offset,
+        )
+        return self._run(checkpoint, batches)
+
+    def import_jsonl(
+        self,
+        path: t.Union[str, "os.PathLike[str]"],
+    ) -> t.List[UpsertBatchResult]:
+        """
+        Upserts(updates or inserts) documents read from a JSON Lines file,
+        skipping the lines acknowledged in the previous runs of the job.
+
+        The results of the batches of this run are returned, and
+        `BatchUpsertError` is raised if any of them has failed.
+
+        :param path: Path of the JSON Lines file.
+        """
+        checkpoint = JobCheckpoint(self._path, self._index.name, os.fspath(path))
+        if checkpoint.completed:
+            return []
+
+        batches = batch_jsonl(
+            path,
+            checkpoint.offset,
+            self._batch_size,
+            self._max_batch_bytes,
+        )
+        return self._run(checkpoint, batches)
+
+    def _run(
+        self,
+        checkpoint: JobCheckpoint,
+        batches: t.Iterable[DocumentBatch],
+    ) -> t.List[UpsertBatchResult]:
+        results = self._index.upsert_batches(
+            batches,
+            self._concurrency,
+            on_result=checkpoint.record,
+        )
+
+        if any(result.error is not None for result in results):
+            raise BatchUpsertError(results)
+
+        checkpoint.complete()
+        return results
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+import typing as t
+import weakref
+from types import TracebackType
+
+# Maximum number of ids to look up in a single query, kept below
+# the limit of the host parameters in a SQLite statement.
+_LOOKUP_SIZE = 500
+
+
+class Manifest:
+    """
+    Local SQLite database of the content hashes of the documents,
+    as they were last upserted into each index.
+
+    When given to `upsert` or `upsert_many`, documents whose content
+    and metadata have not changed since they were last upserted with
+    the same manifest are skipped.
+
+    The documents deleted, and the indexes reset or deleted, through
+    the clients are removed from all of the open manifests. The manifest
+    is not aware of the documents deleted or updated by other means, so
+    it should be cleared for the affected ids with `remove` when that
+    happens.
+
+    ```python
+    from upstash_search.manifest import Manifest
+
+    with Manifest("manifest.db") as manifest:
+        index.upsert_many(documents, manifest=manifest)
+    ```
+    """
+
+    def __init__(self, path: t.Union[str, "os.PathLike[str]"] = ":memory:"):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "index_name TEXT NOT NULL, "
+                "id TEXT NOT NULL, "
+                "digest TEXT NOT NULL, "
+                "PRIMARY KEY (index_name, id)"
+                ") WITHOUT ROWID"
+            )
+
+        _open_manifests.add(self)
+
+    def get(self, index: str, ids: t.Sequence[str]) -> t.Dict[str, str]:
+        """
+        Returns the content hashes of the given document ids of the index,
+        for the ones that are in the manifest.
+
+        :param index: Name of the index.
+        :param ids: List of document ids.
+        """
+        digests: t.Dict[str, str] = {}
+
+        with self._lock:
+            for i in range(0, len(ids), _LOOKUP_SIZE):
+                chunk = ids[i : i + _LOOKUP_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    "SELECT id, digest FROM documents "
+                    f"WHERE index_name = ? AND id IN ({placeholders})",
+                    (index, *chunk),
+                )
+                digests.update(rows)
+
+        return digests
+
+    def update(self, index: str, digests: t.Mapping[str, str]) -> None:
+        """
+        Sets the content hashes of the given document ids of the index.
+
+        :param index: Name of the index.
+        :param digests: Content hashes of the documents, keyed by their ids.
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO documents (index_name, id, digest) "
+                "VALUES (?, ?, ?)",
+                ((index, doc_id, digest) for doc_id, digest in digests.items()),
+            )
+
+    def remove(self, index: str, ids: t.Optional[t.Sequence[str]] = None) -> None:
+        """
+        Removes the given document ids of the index from the manifest,
+        or all of the documents of the index when no ids are given.
+
+        :param index: Name of the index.
+        :param ids: List of document ids to remove.
+        """
+        with self._lock, self._connection:
+            if ids is None:
+                self._connection.execute(
+                    "DELETE FROM documents WHERE index_name = ?",
+                    (index,),
+                )
+            else:
+                self._connection.executemany(
+                    "DELETE FROM documents WHERE index_name = ? AND id = ?",
+                    ((index, doc_id) for doc_id in ids),
+                )
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        _open_manifests.discard(self)
+
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: t.Optional[t.Type[BaseException]],
+        exc_val: t.Optional[BaseException],
+        exc_tb: t.Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+# Manifests that are not closed yet
+_open_manifests: "weakref.WeakSet[Manifest]" = weakref.WeakSet()
+
+
+def forget_documents(index: str, ids: t.Optional[t.Sequence[str]] = None) -> None:
+    """
+    Removes the given document ids of the index, or all of the
+    documents of the index when no ids are given, from all of
+    the open manifests.
+
+    :param index: Name of the index.
+    :param ids: List of document ids to remove.
+    """
+    for manifest in list(_open_manifests):
+        manifest.remove(index, ids)
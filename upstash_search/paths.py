@@ -7,3 +7,7 @@ FETCH_PATH = "/fetch"
 DELETE_PATH = "/delete"
 RANGE_PATH = "/range"
 RESET_PATH = "/reset"
+
+# Paths of the requests that only read, whose identical
+# concurrent requests can share a single response.
+READ_PATHS = frozenset({INFO_PATH, SEARCH_PATH, FETCH_PATH, RANGE_PATH})
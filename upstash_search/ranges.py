@@ -0,0 +1,298 @@
+import asyncio
+import math
+import queue
+import threading
+import typing as t
+
+from upstash_search.errors import ClientError
+from upstash_search.types import RangeDocuments
+
+# Fetches the page of documents starting from the cursor
+FetchPageT = t.Callable[[str], RangeDocuments]
+AsyncFetchPageT = t.Callable[[str], t.Awaitable[RangeDocuments]]
+
+
+class AdaptivePageSize:
+    """
+    Page size of a range scan, tuned by the latency and the
+    response size of the pages.
+
+    The page size is doubled while the pages take less than half
+    of the target latency and are smaller than half of the maximum
+    bytes, and is shrunk in proportion when they take longer than
+    the target latency or are larger than the maximum bytes.
+
+    :param initial: Initial page size.
+    :param min_size: Minimum page size.
+    :param max_size: Maximum page size.
+    :param target_latency: Target latency of a page in seconds.
+    :param max_bytes: Maximum size of a page response in bytes.
+    """
+
+    def __init__(
+        self,
+        initial: int = 100,
+        *,
+        min_size: int = 1,
+        max_size: int = 1000,
+        target_latency: float = 0.5,
+        max_bytes: int = 4 * 1024 * 1024,
+    ):
+        if not 1 <= min_size <= initial <= max_size:
+            raise ClientError(
+                "The page sizes must be positive, and the initial page size "
+                "must be between the minimum and maximum page sizes."
+            )
+
+        if target_latency <= 0 or max_bytes < 1:
+            raise ClientError("The target latency and maximum bytes must be positive.")
+
+        self.size = initial
+        self._min_size = min_size
+        self._max_size = max_size
+        self._target_latency = target_latency
+        self._max_bytes = max_bytes
+
+    def observe(self, latency: float, size: int) -> None:
+        """
+        Adjusts the page size by the latency and the response
+        size of a page fetched with the current page size.
+
+        :param latency: Latency of the page in seconds.
+        :param size: Size of the page response in bytes.
+        """
+        ratio = min(
+            self._target_latency / latency if latency > 0 else math.inf,
+            self._max_bytes / size if size > 0 else math.inf,
+        )
+
+        if ratio < 1:
+            self.size = max(self._min_size, int(self.size * ratio))
+        elif ratio >= 2:
+            self.size = min(self._max_size, self.size * 2)
+
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+# Marks the end of the pages in the prefetch queues
+_DONE = object()
+
+
+def iter_pages(fetch: FetchPageT, cursor: str) -> t.Iterator[RangeDocuments]:
+    """
+    Fetches the pages one after another, starting from the cursor,
+    until there is no next cursor.
+    """
+    while True:
+        page = fetch(cursor)
+        yield page
+
+        if not page.next_cursor:
+            return
+
+        cursor = page.next_cursor
+
+
+def prefetch_pages(
+    fetch: FetchPageT,
+    cursor: str,
+    depth: int,
+) -> t.Iterator[RangeDocuments]:
+    """
+    Fetches the pages in a background thread, keeping at most
+    `depth` many of them ahead of the consumer.
+
+    The thread is stopped when the iterator is closed, after
+    the request it is waiting for, if there is any, completes.
+    """
+    return merge_pages([lambda: iter_pages(fetch, cursor)], 1, depth)
+
+
+def merge_pages(
+    scans: t.Sequence[t.Callable[[], t.Iterator[RangeDocuments]]],
+    concurrency: int,
+    depth: int,
+) -> t.Iterator[RangeDocuments]:
+    """
+    Runs the scans in at most `concurrency` many background threads,
+    and yields their pages in the order they are fetched, keeping at
+    most `depth` many of them ahead of the consumer.
+
+    The threads are stopped when the iterator is closed, after
+    the requests they are waiting for, if there are any, complete.
+    """
+    pages: "queue.Queue[t.Any]" = queue.Queue()
+    stopped = threading.Event()
+    pending = iter(scans)
+    lock = threading.Lock()
+
+    # A slot is taken before each page is fetched, and is given back
+    # when the consumer takes the page, so that the pages being
+    # fetched count towards the depth as well
+    slots = threading.Semaphore(depth)
+
+    def reserve() -> bool:
+        while not stopped.is_set():
+            if slots.acquire(timeout=0.1):
+                return True
+
+        return False
+
+    def produce() -> None:
+        while True:
+            with lock:
+                scan = next(pending, None)
+
+            if scan is None:
+                break
+
+            try:
+                scan_pages = scan()
+                while True:
+                    if not reserve():
+                        return
+
+                    page = next(scan_pages, None)
+                    if page is None:
+                        slots.release()
+                        break
+
+                    pages.put(page)
+            except Exception as e:
+                pages.put(_Failure(e))
+                return
+
+        pages.put(_DONE)
+
+    workers = min(concurrency, len(scans))
+    for _ in range(workers):
+        threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        done = 0
+        while done < workers:
+            item = pages.get()
+            if item is _DONE:
+                done += 1
+                continue
+
+            if isinstance(item, _Failure):
+                raise item.error
+
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+
+
+async def aiter_pages(
+    fetch: AsyncFetchPageT,
+    cursor: str,
+) -> t.AsyncIterator[RangeDocuments]:
+    """
+    Fetches the pages one after another, starting from the cursor,
+    until there is no next cursor.
+    """
+    while True:
+        page = await fetch(cursor)
+        yield page
+
+        if not page.next_cursor:
+            return
+
+        cursor = page.next_cursor
+
+
+def aprefetch_pages(
+    fetch: AsyncFetchPageT,
+    cursor: str,
+    depth: int,
+) -> t.AsyncIterator[RangeDocuments]:
+    """
+    Fetches the pages in a background task, keeping at most
+    `depth` many of them ahead of the consumer.
+
+    The task is cancelled when the iterator is closed.
+    """
+    return amerge_pages([lambda: aiter_pages(fetch, cursor)], 1, depth)
+
+
+async def amerge_pages(
+    scans: t.Sequence[t.Callable[[], t.AsyncIterator[RangeDocuments]]],
+    concurrency: int,
+    depth: int,
+) -> t.AsyncIterator[RangeDocuments]:
+    """
+    Runs the scans in at most `concurrency` many background tasks,
+    and yields their pages in the order they are fetched, keeping at
+    most `depth` many of them ahead of the consumer.
+
+    The tasks are cancelled when the iterator is closed.
+    """
+    pages: "asyncio.Queue[t.Any]" = asyncio.Queue()
+    pending = iter(scans)
+
+    # A slot is taken before each page is fetched, and is given back
+    # when the consumer takes the page, so that the pages being
+    # fetched count towards the depth as well
+    slots = asyncio.Semaphore(depth)
+
+    async def produce() -> None:
+        try:
+            for scan in pending:
+                scan_pages = scan()
+                while True:
+                    await slots.acquire()
+                    try:
+                        page = await scan_pages.__anext__()
+                    except StopAsyncIteration:
+                        slots.release()
+                        break
+
+                    pages.put_nowait(page)
+        except Exception as e:
+            pages.put_nowait(_Failure(e))
+            return
+
+        pages.put_nowait(_DONE)
+
+    tasks = [
+        asyncio.ensure_future(produce()) for _ in range(min(concurrency, len(scans)))
+    ]
+
+    try:
+        done = 0
+        while done < len(tasks):
+            item = await pages.get()
+            if item is _DONE:
+                done += 1
+                continue
+
+            if isinstance(item, _Failure):
+                raise item.error
+
+            slots.release()
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def check_prefixes(prefixes: t.Sequence[str]) -> None:
+    """
+    Checks that the prefixes are disjoint, so that no document
+    is ranged over by more than one of them.
+    """
+    if not prefixes:
+        raise ClientError("At least one prefix must be given.")
+
+    ordered = sorted(prefixes)
+    for previous, prefix in zip(ordered, ordered[1:]):
+        if prefix.startswith(previous):
+            raise ClientError(
+                f"The prefixes must be disjoint, but {prefix!r} "
+                f"starts with {previous!r}."
+            )
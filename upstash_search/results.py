@@ -0,0 +1,441 @@
+import heapq
+import typing as t
+
+from upstash_search.errors import ClientError
+from upstash_search.types import DocumentScore, IndexDocumentScore
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None  # type: ignore[assignment]
+
+NormalizationT = t.Literal["minmax", "zscore"]
+
+
+class ResultSet:
+    """
+    Columnar view of search results, ordered by their scores.
+
+    The scores are a float32 NumPy array when NumPy is installed,
+    and a list of floats otherwise, so that thresholding, top-k
+    selection, normalization and merging of result sets are done
+    on the columns instead of the individual results.
+
+    When returned by `search_columnar`, the columns are built straight
+    from the decoded response, without an object for each result. With
+    msgspec installed, the content and metadata columns are kept as raw
+    JSON, and are only decoded when they are accessed.
+
+    ```python
+    results = index.search_columnar("query", limit=100)
+    top = results.threshold(0.5).normalize().top_k(10)
+    print(top.ids, top.scores)
+    ```
+    """
+
+    def __init__(self, document_scores: t.Sequence[DocumentScore]):
+        self._init(
+            [document_score.id for document_score in document_scores],
+            _to_scores([document_score.score for document_score in document_scores]),
+            [document_score.content for document_score in document_scores],
+            [document_score.metadata for document_score in document_scores],
+        )
+
+    def _init(
+        self,
+        ids: t.List[str],
+        scores: t.Any,
+        content: t.Optional[t.List[t.Any]],
+        metadata: t.Optional[t.List[t.Any]],
+        raw_content: t.Optional[t.List[t.Any]] = None,
+        raw_metadata: t.Optional[t.List[t.Any]] = None,
+    ) -> None:
+        self._ids = ids
+        self._scores = scores
+
+        # Each column is either decoded, or kept as raw JSON
+        # until it is accessed.
+        self._content = content
+        self._metadata = metadata
+        self._raw_content = raw_content
+        self._raw_metadata = raw_metadata
+
+    @classmethod
+    def _from_columns(
+        cls,
+        ids: t.List[str],
+        scores: t.Any,
+        content: t.Optional[t.List[t.Any]],
+        metadata: t.Optional[t.List[t.Any]],
+        raw_content: t.Optional[t.List[t.Any]] = None,
+        raw_metadata: t.Optional[t.List[t.Any]] = None,
+    ) -> "ResultSet":
+        result_set = cls.__new__(cls)
+        result_set._init(ids, scores, content, metadata, raw_content, raw_metadata)
+        return result_set
+
+    @classmethod
+    def _from_rows(cls, rows: t.List[t.Any]) -> "ResultSet":
+        """
+        Builds the columns from the rows decoded by msgspec, keeping
+        the content and metadata as raw JSON.
+        """
+        return cls._from_columns(
+            [row.id for row in rows],
+            _to_scores([row.score for row in rows]),
+            None,
+            None,
+            [row.content for row in rows],
+            [row.metadata for row in rows],
+        )
+
+    @classmethod
+    def _from_results(cls, results: t.List[t.Dict[str, t.Any]]) -> "ResultSet":
+        """
+        Builds the columns from the generic results of a search.
+        """
+        return cls._from_columns(
+            [result["id"] for result in results],
+            _to_scores([result["score"] for result in results]),
+            [result.get("content", {}) for result in results],
+            [result.get("metadata") for result in results],
+        )
+
+    @property
+    def ids(self) -> t.List[str]:
+        """
+        Ids of the documents.
+        """
+        return self._ids
+
+    @property
+    def scores(self) -> t.Any:
+        """
+        Scores of the documents, as a float32 NumPy array when
+        NumPy is installed, or as a list of floats otherwise.
+        """
+        return self._scores
+
+    @property
+    def content(self) -> t.List[t.Dict[t.Any, t.Any]]:
+        """
+        Content of the documents.
+        """
+        if self._content is None:
+            self._content = _decode_column(self._raw_content or [])
+            self._raw_content = None
+
+        return self._content
+
+    @property
+    def metadata(self) -> t.List[t.Optional[t.Dict[t.Any, t.Any]]]:
+        """
+        Metadata of the documents.
+        """
+        if self._metadata is None:
+            self._metadata = _decode_column(self._raw_metadata or [])
+            self._raw_metadata = None
+
+        return self._metadata
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> t.Iterator[DocumentScore]:
+        return iter(self.to_document_scores())
+
+    def __repr__(self) -> str:
+        return f"ResultSet(ids={self._ids!r}, scores={self._scores!r})"
+
+    def to_document_scores(self) -> t.List[DocumentScore]:
+        """
+        Returns the results as a list of document scores,
+        with the scores of this result set.
+        """
+        return [
+            DocumentScore(
+                id=doc_id,
+                score=float(score),
+                content=content,
+                metadata=metadata,
+            )
+            for doc_id, score, content, metadata in zip(
+                self._ids, self._scores, self.content, self.metadata
+            )
+        ]
+
+    def threshold(self, min_score: float) -> "ResultSet":
+        """
+        Returns the results whose scores are at least `min_score`.
+
+        :param min_score: Minimum score of the results to keep.
+        """
+        if np is not None:
+            indices = np.flatnonzero(self._scores >= min_score)
+        else:
+            indices = [i for i, score in enumerate(self._scores) if score >= min_score]
+
+        return self._take(indices)
+
+    def top_k(self, k: int) -> "ResultSet":
+        """
+        Returns the `k` results with the highest scores, ordered
+        by their scores, keeping the order of the ties.
+
+        :param k: Number of results to keep.
+        """
+        if k < 0:
+            raise ClientError("The k must be a non-negative integer.")
+
+        return self._take(_top_indices(self._scores, k))
+
+    def normalize(self, method: NormalizationT = "minmax") -> "ResultSet":
+        """
+        Returns the results with their scores normalized, so that
+        the scores of different result sets are comparable.
+
+        :param method: `minmax` to scale the scores into [0, 1], or
+            `zscore` to scale them to zero mean and unit variance.
+        """
+        if method not in ("minmax", "zscore"):
+            raise ClientError(f"Unsupported normalization method: {method}")
+
+        if len(self) == 0:
+            return self
+
+        if np is not None:
+            values = self._scores.astype(np.float64)
+            if method == "minmax":
+                low, spread = values.min(), np.ptp(values)
+            else:
+                low, spread = values.mean(), values.std()
+
+            if spread == 0:
+                normalized = np.full(len(values), 1.0 if method == "minmax" else 0.0)
+            else:
+                normalized = (values - low) / spread
+
+            scores = normalized.astype(np.float32)
+        else:
+            values = self._scores
+            if method == "minmax":
+                low = min(values)
+                spread = max(values) - low
+            else:
+                low = sum(values) / len(values)
+                spread = (
+                    sum((value - low) ** 2 for value in values) / len(values)
+                ) ** 0.5
+
+            if spread == 0:
+                scores = [1.0 if method == "minmax" else 0.0] * len(values)
+            else:
+                scores = [(value - low) / spread for value in values]
+
+        return ResultSet._from_columns(
+            self._ids,
+            scores,
+            self._content,
+            self._metadata,
+            self._raw_content,
+            self._raw_metadata,
+        )
+
+    @staticmethod
+    def merge(
+        *result_sets: "ResultSet",
+        k: t.Optional[int] = None,
+    ) -> "ResultSet":
+        """
+        Merges the result sets into one, ordered by the scores.
+
+        When a document appears in more than one of the result sets,
+        only its result with the highest score is kept.
+
+        :param result_sets: Result sets to merge.
+        :param k: Optional number of results with the highest scores to keep.
+        """
+        ids = [doc_id for result_set in result_sets for doc_id in result_set._ids]
+
+        if np is not None:
+            scores = np.concatenate(
+                [np.asarray(result_set._scores) for result_set in result_sets]
+                or [np.empty(0, dtype=np.float32)]
+            ).astype(np.float32)
+        else:
+            scores = [
+                float(score)
+                for result_set in result_sets
+                for score in result_set._scores
+            ]
+
+        # The raw columns are kept raw only if all of them are raw
+        raw_content = _concat_raw(result_sets, "_content", "_raw_content")
+        raw_metadata = _concat_raw(result_sets, "_metadata", "_raw_metadata")
+
+        merged = ResultSet._from_columns(
+            ids,
+            scores,
+            None
+            if raw_content is not None
+            else [value for result_set in result_sets for value in result_set.content],
+            None
+            if raw_metadata is not None
+            else [value for result_set in result_sets for value in result_set.metadata],
+            raw_content,
+            raw_metadata,
+        )
+        order = _top_indices(scores, len(ids))
+
+        seen: t.Set[str] = set()
+        unique = []
+        for i in order:
+            doc_id = ids[i]
+            if doc_id in seen:
+                continue
+
+            seen.add(doc_id)
+            unique.append(int(i))
+            if k is not None and len(unique) >= k:
+                break
+
+        return merged._take(unique)
+
+    def _project(self, fields: t.Sequence[str]) -> "ResultSet":
+        return ResultSet._from_columns(
+            self._ids,
+            self._scores,
+            [
+                {field: content[field] for field in fields if field in content}
+                for content in self.content
+            ],
+            self._metadata,
+            None,
+            self._raw_metadata,
+        )
+
+    def _take(self, indices: t.Any) -> "ResultSet":
+        if np is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+            scores = self._scores[indices]
+        else:
+            scores = [self._scores[i] for i in indices]
+
+        def take(column: t.Optional[t.List[t.Any]]) -> t.Optional[t.List[t.Any]]:
+            if column is None:
+                return None
+
+            return [column[i] for i in indices]
+
+        return ResultSet._from_columns(
+            [self._ids[i] for i in indices],
+            scores,
+            take(self._content),
+            take(self._metadata),
+            take(self._raw_content),
+            take(self._raw_metadata),
+        )
+
+
+def _concat_raw(
+    result_sets: t.Sequence[ResultSet],
+    name: str,
+    raw_name: str,
+) -> t.Optional[t.List[t.Any]]:
+    if any(getattr(result_set, name) is not None for result_set in result_sets):
+        return None
+
+    return [
+        value for result_set in result_sets for value in getattr(result_set, raw_name)
+    ]
+
+
+def _decode_column(raw_values: t.List[t.Any]) -> t.List[t.Any]:
+    """
+    Decodes the raw JSON values of a column in a single pass.
+    """
+    if not raw_values:
+        return []
+
+    return msgspec.json.decode(  # type: ignore[no-any-return]
+        b"[" + b",".join(raw_values) + b"]"
+    )
+
+
+def _to_scores(scores: t.List[float]) -> t.Any:
+    if np is not None:
+        return np.asarray(scores, dtype=np.float32)
+
+    return scores
+
+
+def _top_indices(scores: t.Any, k: int) -> t.Any:
+    """
+    Returns the indices of the k highest scores, in descending
+    order of the scores, keeping the order of the ties.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k == 0:
+        return []
+
+    if np is not None:
+        if k < n:
+            # Select the scores above the k-th highest one, and the
+            # first of the ones tied with it, so that the selection
+            # keeps the original order of the ties.
+            kth = -np.partition(-scores, k - 1)[k - 1]
+            above = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)[: k - len(above)]
+            indices = np.concatenate([above, ties])
+        else:
+            indices = np.arange(n)
+
+        # Sort the positions first, so that the stable sort
+        # keeps the original order of the ties.
+        indices.sort()
+        return indices[np.argsort(-scores[indices], kind="stable")]
+
+    return heapq.nlargest(k, range(n), key=scores.__getitem__)
+
+
+def merge_index_results(
+    results: t.Mapping[str, t.Sequence[DocumentScore]],
+    limit: int,
+    weights: t.Optional[t.Mapping[str, float]] = None,
+    normalize: t.Optional[NormalizationT] = None,
+) -> t.List[IndexDocumentScore]:
+    """
+    Merges the search results of the indexes into the `limit`
+    results with the highest scores, tagged with their indexes.
+
+    The scores of each index are normalized first, if a method
+    is given, and then multiplied with the weight of the index.
+    """
+    candidates: t.List[IndexDocumentScore] = []
+
+    for index, document_scores in results.items():
+        scores: t.Iterable[float] = [
+            document_score.score for document_score in document_scores
+        ]
+        if normalize is not None:
+            scores = ResultSet(document_scores).normalize(normalize).scores
+
+        weight = weights.get(index, 1.0) if weights is not None else 1.0
+        for document_score, score in zip(document_scores, scores):
+            candidates.append(
+                IndexDocumentScore(
+                    id=document_score.id,
+                    score=float(score) * weight,
+                    content=document_score.content,
+                    metadata=document_score.metadata,
+                    index=index,
+                )
+            )
+
+    return heapq.nlargest(limit, candidates, key=lambda candidate: candidate.score)
@@ -1,18 +1,48 @@
 import dataclasses
 import typing as t
 
+_T = t.TypeVar("_T")
+
+
+def _slotted(cls: t.Type[_T]) -> t.Type[_T]:
+    """
+    Recreates the dataclass with `__slots__` for its fields, so that
+    its instances do not carry a `__dict__`.
+
+    It is the equivalent of `dataclass(slots=True)`, which is only
+    available in Python 3.10 and later.
+    """
+    # Fields inherited from a slotted base class already have their slots
+    own_annotations = cls.__dict__.get("__annotations__", {})
+    field_names = tuple(
+        field.name
+        for field in dataclasses.fields(cls)  # type: ignore[arg-type]
+        if field.name in own_annotations
+    )
+
+    namespace = dict(cls.__dict__)
+    for name in field_names:
+        namespace.pop(name, None)
+
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = field_names
+
+    return t.cast(t.Type[_T], type(cls.__name__, cls.__bases__, namespace))
 
+
+@_slotted
 @dataclasses.dataclass
 class Document:
     id: str
-    content: t.Dict[t.Any, t.Any]
+    content: t.Dict[t.Any, t.Any] = dataclasses.field(default_factory=dict)
     metadata: t.Optional[t.Dict[t.Any, t.Any]] = None
 
 
 def parse_document(result: t.Dict[t.Any, t.Any]) -> Document:
     return Document(
         id=result["id"],
-        content=result["content"],
+        content=result.get("content", {}),
         metadata=result.get("metadata"),
     )
 
@@ -24,23 +54,31 @@ UpsertDocumentT = t.Union[
 ]
 
 
+@_slotted
 @dataclasses.dataclass
 class DocumentScore:
     id: str
     score: float
-    content: t.Dict[t.Any, t.Any]
+    content: t.Dict[t.Any, t.Any] = dataclasses.field(default_factory=dict)
     metadata: t.Optional[t.Dict[t.Any, t.Any]] = None
 
 
+@_slotted
+@dataclasses.dataclass
+class IndexDocumentScore(DocumentScore):
+    index: str = ""
+
+
 def parse_document_score(result: t.Dict[t.Any, t.Any]) -> DocumentScore:
     return DocumentScore(
         id=result["id"],
         score=result["score"],
-        content=result["content"],
+        content=result.get("content", {}),
         metadata=result.get("metadata"),
     )
 
 
+@_slotted
 @dataclasses.dataclass
 class RangeDocuments:
     next_cursor: str
@@ -54,6 +92,66 @@ def parse_range_documents(result: t.Dict[t.Any, t.Any]) -> RangeDocuments:
     )
 
 
+@dataclasses.dataclass
+class SearchQuery:
+    query: str
+    limit: int = 10
+    filter: str = ""
+    reranking: bool = False
+    semantic_weight: float = 0.75
+    input_enrichment: bool = True
+    include_content: bool = True
+    include_metadata: bool = True
+    content_fields: t.Optional[t.Sequence[str]] = None
+
+
+@dataclasses.dataclass
+class SearchResult:
+    query: SearchQuery
+    document_scores: t.List[DocumentScore] = dataclasses.field(default_factory=list)
+    error: t.Optional[Exception] = None
+
+
+@dataclasses.dataclass
+class UpsertBatchResult:
+    batch: int
+    document_count: int
+    size: int
+    latency: float = 0.0
+    offset: t.Optional[int] = None
+    error: t.Optional[Exception] = None
+
+
+@dataclasses.dataclass
+class IngestSummary:
+    document_count: int
+    batch_count: int
+    size: int
+    duration: float
+    latency_p50: float
+    latency_p90: float
+    latency_p99: float
+    failed_batches: t.List[UpsertBatchResult]
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.document_count / self.duration if self.duration > 0 else 0.0
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+@_slotted
 @dataclasses.dataclass
 class IndexInfo:
     document_count: int
@@ -67,6 +165,7 @@ def parse_index_info(result: t.Dict[t.Any, t.Any]) -> IndexInfo:
     )
 
 
+@_slotted
 @dataclasses.dataclass
 class Info:
     document_count: int
@@ -1,7 +1,40 @@
+import asyncio
+import dataclasses
+import hashlib
+import itertools
+import json
+import math
+import os
 import typing as t
 
+from upstash_search import codec
 from upstash_search.errors import ClientError
-from upstash_search.types import Document
+from upstash_search.manifest import Manifest
+from upstash_search.decoders import LazyDocument
+from upstash_search.types import (
+    Document,
+    DocumentScore,
+    IngestSummary,
+    UpsertBatchResult,
+)
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+
+DocumentT = t.TypeVar("DocumentT", Document, DocumentScore)
+
+_PAYLOAD_KEYS = {"id", "content", "metadata"}
+
+# Number of documents whose content hashes are looked up at once
+_DIGEST_LOOKUP_SIZE = 500
+
+# Number of bits in the bitmap of the ids queued by the manifest diffing
+_QUEUED_BITMAP_SIZE = 1 << 23
+
+# Marks the end of the iterators iterated in a worker thread
+_EXHAUSTED = object()
+
+T = t.TypeVar("T")
 
 
 def documents_to_payload(
@@ -9,18 +42,417 @@ def documents_to_payload(
 ) -> t.List[t.Dict[str, t.Any]]:
     payload = []
     for doc in documents:
-        parsed_doc = _parse_document(doc)
-        payload.append(
-            {
-                "id": parsed_doc.id,
-                "content": parsed_doc.content,
-                "metadata": parsed_doc.metadata,
-            }
-        )
+        payload.append(_document_to_payload(doc))
 
     return payload
 
 
+@dataclasses.dataclass
+class DocumentBatch:
+    ids: t.List[str]
+    payload: bytes
+    offset: t.Optional[int] = None
+    digests: t.Optional[t.Dict[str, str]] = None
+
+
+class DocumentBatcher:
+    """
+    Accumulates serialized documents into batches.
+
+    A batch contains at most `batch_size` documents, and its payload
+    is at most `max_batch_bytes` long, unless a single document is
+    larger than that, in which case it is put in a batch of its own.
+
+    When a document id is added again while its previous version is
+    still in the accumulated batch, the latest version replaces the
+    previous one in place, so that only the latest one is sent.
+    """
+
+    def __init__(self, batch_size: int, max_batch_bytes: int):
+        if batch_size < 1:
+            raise ClientError("The batch size must be a positive integer.")
+
+        if max_batch_bytes < 1:
+            raise ClientError("The maximum batch bytes must be a positive integer.")
+
+        self._batch_size = batch_size
+        self._max_batch_bytes = max_batch_bytes
+        self._encoded_docs: t.Dict[str, bytes] = {}
+        self._digests: t.Dict[str, str] = {}
+        self._size = 2  # the enclosing brackets of the JSON array
+        self._offset: t.Optional[int] = None
+
+    def add(
+        self,
+        document: t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document],
+    ) -> t.Optional[DocumentBatch]:
+        """
+        Adds the document, and returns the previously accumulated
+        batch if the document does not fit into it.
+        """
+        return self.add_encoded(*encode_document(document))
+
+    def add_encoded(
+        self,
+        doc_id: str,
+        encoded_doc: bytes,
+        offset: t.Optional[int] = None,
+        digest: t.Optional[str] = None,
+    ) -> t.Optional[DocumentBatch]:
+        """
+        Adds the already serialized document, and returns the previously
+        accumulated batch if the document does not fit into it.
+
+        The offset, if given, is the position in the input right after
+        the document, and is reported back on the batch it ends up in.
+        The content hash, if given, is reported back the same way.
+        """
+        previous_doc = self._encoded_docs.get(doc_id)
+        if previous_doc is not None:
+            size = self._size + len(encoded_doc) - len(previous_doc)
+            if size <= self._max_batch_bytes:
+                self._encoded_docs[doc_id] = encoded_doc
+                self._size = size
+                self._offset = offset
+                self._set_digest(doc_id, digest)
+                return None
+
+        # Account for the comma separating the document from the previous one
+        doc_size = len(encoded_doc) + 1
+
+        batch = None
+        if self._encoded_docs and (
+            len(self._encoded_docs) >= self._batch_size
+            or self._size + doc_size > self._max_batch_bytes
+        ):
+            batch = self.flush()
+
+        self._encoded_docs[doc_id] = encoded_doc
+        self._size += doc_size
+        self._offset = offset
+        self._set_digest(doc_id, digest)
+        return batch
+
+    def flush(self) -> t.Optional[DocumentBatch]:
+        """
+        Returns the accumulated batch, if there is any.
+        """
+        if not self._encoded_docs:
+            return None
+
+        batch = DocumentBatch(
+            ids=list(self._encoded_docs),
+            payload=b"[" + b",".join(self._encoded_docs.values()) + b"]",
+            offset=self._offset,
+            digests=self._digests or None,
+        )
+        self._encoded_docs, self._digests, self._size = {}, {}, 2
+        return batch
+
+    def _set_digest(self, doc_id: str, digest: t.Optional[str]) -> None:
+        if digest is not None:
+            self._digests[doc_id] = digest
+        else:
+            self._digests.pop(doc_id, None)
+
+
+def batch_documents(
+    documents: t.Iterable[t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document]],
+    batch_size: int,
+    max_batch_bytes: int,
+    offset: t.Optional[int] = None,
+) -> t.Iterator[DocumentBatch]:
+    """
+    Lazily splits the documents into batches of serialized payloads.
+
+    When an offset is given, that many documents are skipped from the
+    start, and each batch reports the number of documents consumed up
+    to its end as its offset.
+    """
+    batcher = DocumentBatcher(batch_size, max_batch_bytes)
+
+    if offset is None:
+        for doc in documents:
+            batch = batcher.add(doc)
+            if batch is not None:
+                yield batch
+    else:
+        remaining = itertools.islice(documents, offset, None)
+        for position, doc in enumerate(remaining, offset + 1):
+            batch = batcher.add_encoded(*encode_document(doc), offset=position)
+            if batch is not None:
+                yield batch
+
+    batch = batcher.flush()
+    if batch is not None:
+        yield batch
+
+
+def batch_changed_documents(
+    documents: t.Iterable[t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document]],
+    manifest: Manifest,
+    index: str,
+    batch_size: int,
+    max_batch_bytes: int,
+) -> t.Iterator[DocumentBatch]:
+    """
+    Lazily splits the documents into batches of serialized payloads,
+    skipping the ones having the same content hash in the manifest.
+
+    The batches carry the content hashes of their documents, to be
+    recorded in the manifest once they are upserted.
+    """
+    batcher = DocumentBatcher(batch_size, max_batch_bytes)
+    documents = iter(documents)
+
+    # Bitmap of the hashes of the ids queued so far. An upsert matching
+    # the manifest is still sent when an earlier upsert of the same id
+    # may be queued, so that the earlier one does not win. A collision
+    # only causes an unchanged document to be sent again.
+    queued = bytearray(_QUEUED_BITMAP_SIZE // 8)
+
+    while True:
+        # Only the latest upsert of each id in the chunk is diffed
+        payloads: t.Dict[str, t.Dict[str, t.Any]] = {}
+        for doc in itertools.islice(documents, _DIGEST_LOOKUP_SIZE):
+            payload = _document_to_payload(doc)
+            payloads.pop(payload["id"], None)
+            payloads[payload["id"]] = payload
+
+        if not payloads:
+            break
+
+        known_digests = manifest.get(index, list(payloads))
+
+        for doc_id, payload in payloads.items():
+            digest = content_digest(payload)
+            bit = hash(doc_id) % _QUEUED_BITMAP_SIZE
+            was_queued = queued[bit >> 3] & (1 << (bit & 7))
+            if known_digests.get(doc_id) == digest and not was_queued:
+                continue
+
+            queued[bit >> 3] |= 1 << (bit & 7)
+            batch = batcher.add_encoded(
+                doc_id,
+                codec.dumps(payload),
+                digest=digest,
+            )
+            if batch is not None:
+                yield batch
+
+    batch = batcher.flush()
+    if batch is not None:
+        yield batch
+
+
+def content_digest(payload: t.Dict[str, t.Any]) -> str:
+    """
+    Returns a stable hash of the content and metadata of the document
+    payload, which does not depend on the order of the keys.
+
+    The standard library encoder is used regardless of the codec,
+    so that the hashes do not change with the installed packages.
+    """
+    encoded = json.dumps(
+        [payload["content"], payload.get("metadata")],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+async def abatch_documents(
+    documents: t.Union[
+        t.Iterable[t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document]],
+        t.AsyncIterable[t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document]],
+    ],
+    batch_size: int,
+    max_batch_bytes: int,
+) -> t.AsyncIterator[DocumentBatch]:
+    """
+    Lazily splits the documents, given either as an iterable
+    or an async iterable, into batches of serialized payloads.
+
+    The documents of an iterable are iterated over and encoded in
+    a worker thread, so that they do not block the event loop.
+    """
+    if not isinstance(documents, t.AsyncIterable):
+        batches = batch_documents(documents, batch_size, max_batch_bytes)
+        async for full_batch in aiter_in_thread(batches):
+            yield full_batch
+        return
+
+    batcher = DocumentBatcher(batch_size, max_batch_bytes)
+
+    async for doc in documents:
+        batch = batcher.add(doc)
+        if batch is not None:
+            yield batch
+
+    batch = batcher.flush()
+    if batch is not None:
+        yield batch
+
+
+async def aiter_in_thread(iterator: t.Iterator[T]) -> t.AsyncIterator[T]:
+    """
+    Iterates over the blocking iterator in a worker thread, so that
+    producing its items, such as reading and parsing the lines of a
+    file, does not block the event loop.
+    """
+    while True:
+        item = await asyncio.to_thread(next, iterator, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return
+
+        yield t.cast(T, item)
+
+
+def batch_jsonl(
+    path: t.Union[str, "os.PathLike[str]"],
+    offset: int,
+    batch_size: int,
+    max_batch_bytes: int,
+) -> t.Iterator[DocumentBatch]:
+    """
+    Lazily reads the JSON Lines file, starting from the byte offset,
+    and splits its documents into batches of serialized payloads.
+
+    Each line is parsed only to be validated, and is put into the
+    batch payload as it is, unless its fields are not exactly the
+    id, content and metadata fields.
+    """
+    batcher = DocumentBatcher(batch_size, max_batch_bytes)
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+
+        for line in f:
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                record = codec.loads(line)
+            except ValueError as e:
+                raise ClientError(
+                    f"Invalid JSON in the line ending at byte offset {offset}: {e}"
+                ) from e
+
+            if not isinstance(record, dict) or not {"id", "content"} <= record.keys():
+                raise ClientError(
+                    f"The line ending at byte offset {offset} must be a JSON "
+                    "object containing the id and content fields."
+                )
+
+            if record.keys() != _PAYLOAD_KEYS:
+                line = codec.dumps(_document_to_payload(record))
+
+            batch = batcher.add_encoded(record["id"], line, offset)
+            if batch is not None:
+                yield batch
+
+    batch = batcher.flush()
+    if batch is not None:
+        yield batch
+
+
+def project_content(document: DocumentT, fields: t.Sequence[str]) -> DocumentT:
+    """
+    Returns a copy of the document that only has the given
+    top level fields in its content.
+    """
+    content = document.content
+    return dataclasses.replace(
+        document,
+        content={field: content[field] for field in fields if field in content},
+    )
+
+
+def percentile(values: t.Sequence[float], q: float) -> float:
+    """
+    Returns the q-th percentile of the sorted values,
+    using the nearest-rank method.
+    """
+    if not values:
+        return 0.0
+
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize_batches(
+    results: t.Sequence[UpsertBatchResult],
+    duration: float,
+) -> IngestSummary:
+    """
+    Returns the summary of the batch results, upserted in
+    the given duration.
+    """
+    latencies = sorted(result.latency for result in results)
+    return IngestSummary(
+        document_count=sum(result.document_count for result in results),
+        batch_count=len(results),
+        size=sum(result.size for result in results),
+        duration=duration,
+        latency_p50=percentile(latencies, 50),
+        latency_p90=percentile(latencies, 90),
+        latency_p99=percentile(latencies, 99),
+        failed_batches=[result for result in results if result.error is not None],
+    )
+
+
+def encode_document(
+    document: t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document],
+) -> t.Tuple[str, bytes]:
+    """
+    Returns the id and the serialized payload of the document.
+    """
+    if type(document) is LazyDocument:
+        # The content and metadata that are not decoded yet
+        # are put into the payload as they are received.
+        raw_fields = document._raw_fields()
+        if raw_fields is not None:
+            return document.id, b'{"id":%s,"content":%s,"metadata":%s}' % (
+                codec.dumps(document.id),
+                *raw_fields,
+            )
+
+    payload = _document_to_payload(document)
+    return payload["id"], codec.dumps(payload)
+
+
+def _document_to_payload(
+    document: t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document],
+) -> t.Dict[str, t.Any]:
+    # Fast paths for the exact built-in types, which skip
+    # building an intermediate Document for each document.
+    if type(document) is dict:
+        if (
+            "id" in document
+            and "content" in document
+            and document.keys() <= _PAYLOAD_KEYS
+        ):
+            return {
+                "id": document["id"],
+                "content": document["content"],
+                "metadata": document.get("metadata"),
+            }
+    elif type(document) is tuple:
+        if len(document) == 2:
+            return {"id": document[0], "content": document[1], "metadata": None}
+        elif len(document) > 2:
+            return {"id": document[0], "content": document[1], "metadata": document[2]}
+
+    parsed_doc = _parse_document(document)
+    return {
+        "id": parsed_doc.id,
+        "content": parsed_doc.content,
+        "metadata": parsed_doc.metadata,
+    }
+
+
 def _parse_document(
     document: t.Union[t.Dict[t.Any, t.Any], t.Tuple[t.Any, ...], Document],
 ) -> Document:
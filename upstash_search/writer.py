@@ -0,0 +1,286 @@
+import threading
+import typing as t
+from types import TracebackType
+
+from upstash_search.cache import SearchCache
+from upstash_search.errors import ClientError
+from upstash_search.http import Requester
+from upstash_search.manifest import forget_documents
+from upstash_search.paths import DELETE_PATH, UPSERT_PATH
+from upstash_search.types import Document, UpsertDocumentT
+from upstash_search.utils import (
+    DEFAULT_BATCH_BYTES,
+    DEFAULT_BATCH_SIZE,
+    DocumentBatcher,
+    encode_document,
+)
+
+# Pending operations, mapping document ids to the serialized
+# documents to upsert, or to None for the ids to delete.
+OperationsT = t.Dict[str, t.Optional[bytes]]
+
+
+class BufferedWriter:
+    """
+    Buffers upserts and deletes of an index in memory, and sends them
+    in batches.
+
+    Pending operations are coalesced by document id, so that only the
+    latest upsert or delete of each document is sent. They are flushed
+    when `max_documents` many of them are buffered, when the serialized
+    documents reach `max_bytes`, every `flush_interval` seconds, and
+    when the writer is closed.
+
+    ```python
+    with index.writer() as writer:
+        writer.upsert(("id-0", {"data": 0}))
+        writer.delete(ids=["id-1"])
+    ```
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requester: Requester,
+        *,
+        max_documents: int = DEFAULT_BATCH_SIZE,
+        max_bytes: int = DEFAULT_BATCH_BYTES,
+        flush_interval: t.Optional[float] = 1.0,
+        cache: t.Optional[SearchCache] = None,
+    ):
+        if max_documents < 1:
+            raise ClientError("The maximum documents must be a positive integer.")
+
+        if max_bytes < 1:
+            raise ClientError("The maximum bytes must be a positive integer.")
+
+        if flush_interval is not None and flush_interval <= 0:
+            raise ClientError("The flush interval must be positive.")
+
+        self._name = name
+        self._requester = requester
+        self._cache = cache
+        self._max_documents = max_documents
+        self._max_bytes = max_bytes
+
+        self._operations: OperationsT = {}
+        self._size = 0
+        self._error: t.Optional[Exception] = None
+        self._closed = False
+
+        # Guards the pending operations
+        self._lock = threading.Lock()
+
+        # Keeps the flushes in order
+        self._flush_lock = threading.Lock()
+
+        self._closing = threading.Event()
+        self._flusher: t.Optional[threading.Thread] = None
+        if flush_interval is not None:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically,
+                args=(flush_interval,),
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def upsert(
+        self,
+        documents: t.Union[UpsertDocumentT, t.Iterable[UpsertDocumentT]],
+    ) -> None:
+        """
+        Buffers documents to upsert(update or insert).
+
+        :param documents: Documents to upsert.
+        """
+        if isinstance(documents, (Document, dict, tuple)):
+            documents = [documents]
+
+        encoded_docs = [encode_document(doc) for doc in documents]
+
+        with self._lock:
+            self._check_open()
+            for doc_id, encoded_doc in encoded_docs:
+                self._add_operation(doc_id, encoded_doc)
+
+        self._flush_if_full()
+
+    def delete(self, *, ids: t.Sequence[str]) -> None:
+        """
+        Buffers the deletion of the documents having the given ids.
+
+        :param ids: List of document ids to delete.
+        """
+        with self._lock:
+            self._check_open()
+            for doc_id in ids:
+                self._add_operation(doc_id, None)
+
+        self._flush_if_full()
+
+    def flush(self) -> None:
+        """
+        Sends the pending operations.
+
+        Raises the error of a failed periodic flush, if there is any.
+        The operations that could not be sent are kept in the buffer,
+        to be sent with the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                error, self._error = self._error, None
+
+            if error is not None:
+                raise error
+
+            self._send(self._take_operations())
+
+    def close(self) -> None:
+        """
+        Stops the periodic flushes, and flushes the pending operations.
+        """
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+
+        self._closing.set()
+        if self._flusher is not None:
+            self._flusher.join()
+
+        self.flush()
+
+    def __enter__(self) -> "BufferedWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: t.Optional[t.Type[BaseException]],
+        exc_val: t.Optional[BaseException],
+        exc_tb: t.Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def _add_operation(self, doc_id: str, encoded_doc: t.Optional[bytes]) -> None:
+        previous_doc = self._operations.pop(doc_id, None)
+        if previous_doc is not None:
+            self._size -= len(previous_doc)
+
+        self._operations[doc_id] = encoded_doc
+        if encoded_doc is not None:
+            self._size += len(encoded_doc)
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ClientError("The writer is closed.")
+
+    def _flush_if_full(self) -> None:
+        with self._lock:
+            full = (
+                len(self._operations) >= self._max_documents
+                or self._size >= self._max_bytes
+            )
+
+        if full:
+            self.flush()
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._closing.wait(interval):
+            with self._flush_lock:
+                try:
+                    self._send(self._take_operations())
+                except Exception as e:
+                    with self._lock:
+                        self._error = e
+
+    def _take_operations(self) -> OperationsT:
+        with self._lock:
+            operations, self._operations, self._size = self._operations, {}, 0
+
+        return operations
+
+    def _send(self, operations: OperationsT) -> None:
+        if not operations:
+            return
+
+        # Ids of the documents whose operations are sent
+        sent: t.Set[str] = set()
+
+        try:
+            for encoded_docs, ids in group_operations(
+                operations, self._max_documents, self._max_bytes
+            ):
+                if encoded_docs is not None:
+                    self._requester.post(
+                        path=UPSERT_PATH,
+                        payload=encoded_docs,
+                        index=self._name,
+                    )
+                else:
+                    self._requester.post(
+                        path=DELETE_PATH,
+                        payload={"ids": ids},
+                        index=self._name,
+                    )
+                    forget_documents(self._name, ids)
+
+                sent.update(ids)
+        except BaseException:
+            self._restore_operations(
+                {
+                    doc_id: encoded_doc
+                    for doc_id, encoded_doc in operations.items()
+                    if doc_id not in sent
+                }
+            )
+            raise
+        finally:
+            if self._cache is not None:
+                self._cache.invalidate(self._name)
+
+    def _restore_operations(self, operations: OperationsT) -> None:
+        """
+        Puts the operations that could not be sent back into the buffer,
+        unless newer operations of the same documents are buffered since.
+        """
+        with self._lock:
+            for doc_id, encoded_doc in operations.items():
+                if doc_id not in self._operations:
+                    self._add_operation(doc_id, encoded_doc)
+
+
+def group_operations(
+    operations: OperationsT,
+    max_documents: int,
+    max_bytes: int,
+) -> t.Iterator[t.Tuple[t.Optional[bytes], t.List[str]]]:
+    """
+    Groups the coalesced operations into requests.
+
+    Since there is a single operation for each document id, they are
+    independent of each other, and all the deletes are sent first in
+    a single request, followed by the upserts in batches.
+
+    Yields pairs of upsert payloads and their ids, or None and
+    the ids to delete.
+    """
+    deletes = [
+        doc_id for doc_id, encoded_doc in operations.items() if encoded_doc is None
+    ]
+    if deletes:
+        yield None, deletes
+
+    batcher = DocumentBatcher(max_documents, max_bytes)
+
+    for doc_id, encoded_doc in operations.items():
+        if encoded_doc is None:
+            continue
+
+        batch = batcher.add_encoded(doc_id, encoded_doc)
+        if batch is not None:
+            yield batch.payload, batch.ids
+
+    batch = batcher.flush()
+    if batch is not None:
+        yield batch.payload, batch.ids